@@ -2,8 +2,7 @@ from django.contrib import admin
 from django.conf.urls.static import static
 from django.conf import settings
 from django.urls import path, include
-from django.contrib.sitemaps.views import sitemap
-from user_side.sitemaps import StaticViewSitemap, AnimeSitemap, EpisodeSitemap, GenreSitemap
+from user_side.sitemaps import StaticViewSitemap, AnimeSitemap, EpisodeSitemap, GenreSitemap, streaming_sitemap
 
 
 sitemaps = {
@@ -18,5 +17,5 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('user_side.urls')), 
     path('', include('docs.urls')),
-    path('sitemap.xml', sitemap, {'sitemaps': sitemaps}, name='sitemap'),
+    path('sitemap.xml', streaming_sitemap, {'sitemaps': sitemaps}, name='sitemap'),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
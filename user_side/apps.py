@@ -6,6 +6,7 @@ class UserSideConfig(AppConfig):
     name = 'user_side'
 
     def ready(self):
+        from user_side import signals  # noqa: F401
         from user_side.templatetags import compat
 
         django_engine = engines['django']
@@ -0,0 +1,54 @@
+import hashlib
+import time
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+# Validated access tokens keyed by digest, per process. Entries expire with the
+# token itself; access tokens are not checked against the blacklist, so there
+# is nothing else that could invalidate them early.
+_validated_tokens = {}
+MAX_CACHED_TOKENS = 10000
+
+BLACKLISTED_TOKEN_CACHE_PREFIX = 'jwt:blacklisted'
+
+
+def token_digest(raw_token):
+    if isinstance(raw_token, str):
+        raw_token = raw_token.encode()
+    return hashlib.blake2b(raw_token, digest_size=16).hexdigest()
+
+
+def token_ttl(token):
+    return int(token['exp'] - time.time())
+
+
+def mark_blacklisted(token, raw_token):
+    ttl = token_ttl(token)
+    if ttl > 0:
+        cache.set(f"{BLACKLISTED_TOKEN_CACHE_PREFIX}:{token_digest(raw_token)}", True, ttl)
+
+
+def is_blacklisted(raw_token):
+    return cache.get(f"{BLACKLISTED_TOKEN_CACHE_PREFIX}:{token_digest(raw_token)}", False)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that skips signature verification for access tokens it
+    has already validated. Invalid tokens are never cached.
+    """
+    def get_validated_token(self, raw_token):
+        key = token_digest(raw_token)
+        entry = _validated_tokens.get(key)
+        if entry is not None:
+            token, expires_at = entry
+            if expires_at > time.time():
+                return token
+            _validated_tokens.pop(key, None)
+
+        token = super().get_validated_token(raw_token)
+
+        if len(_validated_tokens) >= MAX_CACHED_TOKENS:
+            _validated_tokens.clear()
+        _validated_tokens[key] = (token, token['exp'])
+        return token
@@ -0,0 +1,33 @@
+import time
+from django.conf import settings
+from django.core.cache import cache
+
+CATALOG_CACHE_NAMESPACE = 'catalog'
+
+# LocMemCache is per process, so invalidation only reaches the worker that
+# handled the write; other workers serve stale entries until they expire.
+# Without a shared cache the timeouts are kept short to bound that window.
+SHARED_CACHE = settings.CACHES['default']['BACKEND'] != 'django.core.cache.backends.locmem.LocMemCache'
+LOCAL_CACHE_TIMEOUT = 10
+
+CATALOG_CACHE_TIMEOUT = 60 * 5 if SHARED_CACHE else LOCAL_CACHE_TIMEOUT
+PUBLISHED_ANIME_CACHE_TIMEOUT = 60 if SHARED_CACHE else LOCAL_CACHE_TIMEOUT
+
+
+def get_cache_version(namespace):
+    return cache.get_or_set(f'{namespace}:version', time.time_ns, timeout=None)
+
+
+def bump_cache_version(namespace):
+    """
+    Invalidate every key built with the namespace version. Falls back to a fresh
+    timestamp if the counter was evicted so old keys are never reused.
+    """
+    try:
+        cache.incr(f'{namespace}:version')
+    except ValueError:
+        cache.set(f'{namespace}:version', time.time_ns(), timeout=None)
+
+
+def published_anime_cache_key(field, value):
+    return f'anime:published:{field}:{value}'
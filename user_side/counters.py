@@ -0,0 +1,93 @@
+import logging
+import redis
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from .models import Anime, Episode
+
+logger = logging.getLogger(__name__)
+
+EPISODE_VIEWS_KEY = 'views:episode'
+ANIME_VIEWS_KEY = 'views:anime'
+FLUSH_BATCH_SIZE = 500
+FLUSH_LOCK_TIMEOUT = 60
+
+_client = None
+
+
+def get_redis():
+    global _client
+    if _client is None and settings.REDIS_URL:
+        _client = redis.Redis.from_url(settings.REDIS_URL)
+    return _client
+
+
+def increment_views(episode_id, anime_id):
+    """
+    Count one view of an episode and its anime. With Redis the deltas are
+    buffered in hashes and written back by flush_views(); without it, or if
+    Redis is unreachable, the counters are updated in the database directly.
+    """
+    client = get_redis()
+    if client is not None:
+        try:
+            pipe = client.pipeline(transaction=False)
+            pipe.hincrby(EPISODE_VIEWS_KEY, episode_id, 1)
+            pipe.hincrby(ANIME_VIEWS_KEY, anime_id, 1)
+            pipe.execute()
+            return
+        except redis.RedisError as e:
+            logger.warning("Buffering views in redis failed, updating directly: %s", e)
+
+    Episode.objects.filter(pk=episode_id).update(total_views=F('total_views') + 1)
+    Anime.objects.filter(pk=anime_id).update(total_views=F('total_views') + 1)
+
+
+def apply_view_deltas(model, deltas):
+    """Add the buffered views to total_views, one UPDATE per batch of rows."""
+    items = list(deltas.items())
+    with transaction.atomic():
+        for start in range(0, len(items), FLUSH_BATCH_SIZE):
+            batch = dict(items[start:start + FLUSH_BATCH_SIZE])
+            increment = Case(
+                *[When(pk=pk, then=Value(delta)) for pk, delta in batch.items()],
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+            model.objects.filter(pk__in=batch).update(total_views=F('total_views') + increment)
+
+
+def claim_view_deltas(client, key):
+    """Read and clear a counter hash in one MULTI/EXEC, so no view is claimed twice."""
+    pipe = client.pipeline(transaction=True)
+    pipe.hgetall(key)
+    pipe.delete(key)
+    deltas, _ = pipe.execute()
+    return {int(pk): int(delta) for pk, delta in deltas.items()}
+
+
+def flush_views():
+    client = get_redis()
+    if client is None:
+        return
+
+    for model, key in ((Episode, EPISODE_VIEWS_KEY), (Anime, ANIME_VIEWS_KEY)):
+        # Overlapping runs (beat plus a manual flush) skip instead of queueing up.
+        lock = client.lock(f'{key}:flush', timeout=FLUSH_LOCK_TIMEOUT, blocking=False)
+        if not lock.acquire():
+            continue
+        try:
+            deltas = claim_view_deltas(client, key)
+            if not deltas:
+                continue
+            try:
+                apply_view_deltas(model, deltas)
+            except Exception:
+                # The batch is already out of redis; hand it back for the next run.
+                pipe = client.pipeline(transaction=False)
+                for pk, delta in deltas.items():
+                    pipe.hincrby(key, pk, delta)
+                pipe.execute()
+                raise
+        finally:
+            lock.release()
@@ -27,4 +27,15 @@ class EpisodeFilter(FilterSet):
     
     class Meta:
         model = Episode
-        fields = []
\ No newline at end of file
+        fields = []
+
+class AnimeSearchFilter(filters.SearchFilter):
+    """
+    ?search= over Anime.SEARCH_FIELDS via the denormalized search_text column.
+    Every term must match, as with SearchFilter, but each term is a single
+    LIKE instead of one ILIKE per field.
+    """
+    def filter_queryset(self, request, queryset, view):
+        for term in self.get_search_terms(request):
+            queryset = queryset.filter(search_text__contains=term.casefold())
+        return queryset
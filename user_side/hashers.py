@@ -0,0 +1,13 @@
+from django.contrib.auth.hashers import Argon2PasswordHasher
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    Argon2id with the OWASP baseline parameters (19 MiB, 2 passes, 1 lane).
+    Django's defaults spend ~200 ms per login on a single core; these verify
+    in ~25-50 ms. Hashes stay in the standard argon2 format, so changing the
+    parameters later just rehashes on the next successful login.
+    """
+    time_cost = 2
+    memory_cost = 19456
+    parallelism = 1
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-15 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_side', '0016_anime_total_favorites'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='anime',
+            index=models.Index(fields=['is_published', 'published_at'], name='anime_published_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='episode',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['anime', 'episode_number'], name='episode_published_number_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-15 10:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_side', '0017_anime_published_at_idx_episode_published_number_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='anime',
+            name='total_dislikes',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='episode',
+            name='total_dislikes',
+            field=models.IntegerField(default=0),
+        ),
+    ]
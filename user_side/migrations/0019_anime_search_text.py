@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-15 11:05
+
+from django.db import migrations, models
+
+SEARCH_FIELDS = ('title', 'english_title', 'russian_title', 'uzbek_title', 'description', 'type', 'status', 'season')
+
+
+def populate_search_text(apps, schema_editor):
+    Anime = apps.get_model('user_side', 'Anime')
+    # The migration state may lag behind the model; missing fields are filled in on the next save().
+    known = {field.name for field in Anime._meta.concrete_fields}
+    fields = [field for field in SEARCH_FIELDS if field in known]
+    batch = []
+    for anime in Anime.objects.only('pk', *fields).iterator(chunk_size=500):
+        anime.search_text = '\n'.join(str(getattr(anime, field, '') or '') for field in SEARCH_FIELDS).casefold()
+        batch.append(anime)
+        if len(batch) >= 500:
+            Anime.objects.bulk_update(batch, ['search_text'])
+            batch = []
+    if batch:
+        Anime.objects.bulk_update(batch, ['search_text'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_side', '0018_anime_total_dislikes_episode_total_dislikes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='anime',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(populate_search_text, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-15 11:48
+
+from django.db import migrations
+from django.db.models.functions import Lower
+
+
+def lowercase_slugs(apps, schema_editor):
+    for model_name in ('Anime', 'Episode'):
+        model = apps.get_model('user_side', model_name)
+        max_length = model._meta.get_field('slug').max_length
+        mixed_case = model.objects.exclude(slug=Lower('slug')).values_list('pk', 'slug')
+        for pk, slug in list(mixed_case):
+            new_slug = slug.lower()
+            # Lookups lowercase the identifier, so a row that would collide gets a pk suffix
+            # instead of staying mixed-case and unreachable.
+            if model.objects.filter(slug=new_slug).exclude(pk=pk).exists():
+                suffix = f'-{pk}'
+                new_slug = new_slug[:max_length - len(suffix)] + suffix
+                if model.objects.filter(slug=new_slug).exclude(pk=pk).exists():
+                    raise RuntimeError(
+                        f"Cannot lowercase {model_name} slug {slug!r}: {new_slug!r} is taken as well"
+                    )
+            model.objects.filter(pk=pk).update(slug=new_slug)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_side', '0019_anime_search_text'),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_slugs, migrations.RunPython.noop),
+    ]
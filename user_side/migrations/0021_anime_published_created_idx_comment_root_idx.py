@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-15 12:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_side', '0020_lowercase_anime_episode_slugs'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='anime',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['-created_at'], name='anime_published_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('is_approved', True), ('parent__isnull', True)), fields=['anime', '-created_at'], name='comment_anime_root_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('is_approved', True), ('parent__isnull', True)), fields=['episode', '-created_at'], name='comment_episode_root_idx'),
+        ),
+    ]
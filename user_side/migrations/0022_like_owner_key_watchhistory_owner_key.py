@@ -0,0 +1,80 @@
+# Generated by Django 5.2.7 on 2026-10-15 23:20
+
+from django.db import migrations, models
+from django.db.models.functions import Cast, Concat
+
+
+def populate_owner_key(apps, schema_editor):
+    for model_name in ('Like', 'WatchHistory'):
+        model = apps.get_model('user_side', model_name)
+        model.objects.filter(user__isnull=False).update(
+            owner_key=Concat(models.Value('u:'), Cast('user_id', models.CharField()))
+        )
+        model.objects.filter(user__isnull=True, anonymous_session__isnull=False).update(
+            owner_key=Concat(models.Value('s:'), Cast('anonymous_session_id', models.CharField()))
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_side', '0021_anime_published_created_idx_comment_root_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='like',
+            name='owner_key',
+            field=models.CharField(editable=False, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='watchhistory',
+            name='owner_key',
+            field=models.CharField(editable=False, max_length=64, null=True),
+        ),
+        migrations.RunPython(populate_owner_key, migrations.RunPython.noop),
+        migrations.RemoveConstraint(
+            model_name='like',
+            name='unique_user_anime_like',
+        ),
+        migrations.RemoveConstraint(
+            model_name='like',
+            name='unique_user_episode_like',
+        ),
+        migrations.RemoveConstraint(
+            model_name='like',
+            name='unique_anon_anime_like',
+        ),
+        migrations.RemoveConstraint(
+            model_name='like',
+            name='unique_anon_episode_like',
+        ),
+        migrations.RemoveConstraint(
+            model_name='watchhistory',
+            name='unique_user_anime_episode',
+        ),
+        migrations.RemoveConstraint(
+            model_name='watchhistory',
+            name='unique_session_anime_episode',
+        ),
+        migrations.RemoveIndex(
+            model_name='watchhistory',
+            name='user_side_w_user_id_2054f8_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='watchhistory',
+            name='user_side_w_anonymo_33a6dc_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='like',
+            constraint=models.UniqueConstraint(condition=models.Q(('anime__isnull', False), ('episode__isnull', True)), fields=('owner_key', 'anime'), name='unique_owner_anime_like'),
+        ),
+        migrations.AddConstraint(
+            model_name='like',
+            constraint=models.UniqueConstraint(condition=models.Q(('episode__isnull', False)), fields=('owner_key', 'episode'), name='unique_owner_episode_like'),
+        ),
+        migrations.AddConstraint(
+            model_name='watchhistory',
+            constraint=models.UniqueConstraint(fields=('owner_key', 'anime', 'episode'), name='unique_owner_anime_episode'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-15 23:40
+
+from django.db import migrations
+
+
+def create_trigram_index(apps, schema_editor):
+    # Trigram indexes are PostgreSQL only; elsewhere search_text stays a plain LIKE.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS anime_search_text_trgm_idx '
+        'ON user_side_anime USING gin (search_text gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS anime_search_text_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_side', '0022_like_owner_key_watchhistory_owner_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
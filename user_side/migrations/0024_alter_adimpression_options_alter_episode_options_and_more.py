@@ -0,0 +1,260 @@
+# Generated by Django 5.2.7 on 2026-10-15 23:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_side', '0023_anime_search_text_trgm_idx'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='adimpression',
+            options={'verbose_name': 'Ad Impression', 'verbose_name_plural': 'Ad Impressions'},
+        ),
+        migrations.AlterModelOptions(
+            name='episode',
+            options={'ordering': ['anime', 'episode_number']},
+        ),
+        migrations.AlterModelOptions(
+            name='episodelanguage',
+            options={'ordering': ['language', '-video_quality'], 'verbose_name': 'Video Track', 'verbose_name_plural': 'Video Tracks'},
+        ),
+        migrations.AlterModelOptions(
+            name='watchhistory',
+            options={'verbose_name': 'Watch History', 'verbose_name_plural': 'Watch Histories'},
+        ),
+        migrations.AddField(
+            model_name='anime',
+            name='russian_title',
+            field=models.CharField(blank=True, max_length=50, null=True),
+        ),
+        migrations.AddField(
+            model_name='anime',
+            name='views_count',
+            field=models.PositiveBigIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='episode',
+            name='title_ru',
+            field=models.CharField(blank=True, max_length=50, null=True),
+        ),
+        migrations.AddField(
+            model_name='episode',
+            name='total_comments',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='genre',
+            name='name_ru',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AlterField(
+            model_name='adimpression',
+            name='anonymous_session',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='user_side.anonymoussession'),
+        ),
+        migrations.AlterField(
+            model_name='adimpression',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='advertisement',
+            name='content_url',
+            field=models.FileField(upload_to='media/ads/content/'),
+        ),
+        migrations.AlterField(
+            model_name='advertisement',
+            name='position',
+            field=models.TextField(choices=[('pre_roll', 'Pre-Roll (Before Video)'), ('mid_roll', 'Mid-Roll (During Video)'), ('post_roll', 'Post-Roll (After Video)'), ('sidebar', 'Sidebar'), ('top_banner', 'Top Banner')]),
+        ),
+        migrations.AlterField(
+            model_name='advertisement',
+            name='type',
+            field=models.TextField(choices=[('video', 'Video Ad'), ('banner', 'Banner Ad'), ('popup', 'Popup Ad')]),
+        ),
+        migrations.AlterField(
+            model_name='anime',
+            name='banner_url',
+            field=models.FileField(upload_to='media/anime/banners/'),
+        ),
+        migrations.AlterField(
+            model_name='anime',
+            name='description',
+            field=models.CharField(max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='anime',
+            name='english_title',
+            field=models.CharField(max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='anime',
+            name='poster_url',
+            field=models.FileField(upload_to='media/anime/posters/'),
+        ),
+        migrations.AlterField(
+            model_name='anime',
+            name='published_at',
+            field=models.DateTimeField(auto_now_add=True),
+        ),
+        migrations.AlterField(
+            model_name='anime',
+            name='rating',
+            field=models.FloatField(default=8),
+        ),
+        migrations.AlterField(
+            model_name='anime',
+            name='season',
+            field=models.CharField(max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='anime',
+            name='status',
+            field=models.CharField(choices=[('ONGOING', 'Ongoing'), ('COMPLETED', 'Completed'), ('ANNOUNCED', 'Announced'), ('HIATUS', 'Hiatus'), ('CANCELLED', 'Cancelled')], default='ONGOING', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='anime',
+            name='title',
+            field=models.CharField(max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='anime',
+            name='total_comments',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='anime',
+            name='total_favorites',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='anime',
+            name='total_likes',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='anime',
+            name='total_views',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='anime',
+            name='trailer_url',
+            field=models.FileField(upload_to='media/anime/trailers/'),
+        ),
+        migrations.AlterField(
+            model_name='anime',
+            name='type',
+            field=models.CharField(choices=[('TV', 'TV Series'), ('MOVIE', 'Movie'), ('OVA', 'Original Video Animation'), ('ONA', 'Original Net Animation'), ('SPECIAL', 'Special')], default='TV', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='anime',
+            name='uzbek_title',
+            field=models.CharField(max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='anonymoussession',
+            name='session_token',
+            field=models.CharField(max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='episode',
+            name='anime',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='episodes', to='user_side.anime'),
+        ),
+        migrations.AlterField(
+            model_name='episode',
+            name='duration_seconds',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='episode',
+            name='slug',
+            field=models.SlugField(unique=True),
+        ),
+        migrations.AlterField(
+            model_name='episode',
+            name='thumbnail_url',
+            field=models.FileField(upload_to='media/episodes/thumbnails/'),
+        ),
+        migrations.AlterField(
+            model_name='episode',
+            name='title',
+            field=models.CharField(max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='episode',
+            name='total_likes',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='episode',
+            name='total_views',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='episodelanguage',
+            name='episode',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='languages', to='user_side.episode'),
+        ),
+        migrations.AlterField(
+            model_name='episodelanguage',
+            name='file_size_mb',
+            field=models.CharField(max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='episodelanguage',
+            name='language',
+            field=models.CharField(choices=[('uzbek', "O'zbek tili"), ('russian', 'Русский язык'), ('english', 'English'), ('japanese', '日本語')], default='uzbek', max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='episodelanguage',
+            name='video_quality',
+            field=models.CharField(choices=[('360p', '360p'), ('480p', '480p'), ('720p', '720p HD'), ('1080p', '1080p Full HD'), ('1440p', '1440p 2K'), ('2160p', '2160p 4K')], default='1080p', max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='episodelanguage',
+            name='video_url',
+            field=models.FileField(upload_to='media/episodes/videos/'),
+        ),
+        migrations.AlterField(
+            model_name='payment',
+            name='status',
+            field=models.TextField(choices=[('completed', 'Completed'), ('pending', 'Pending'), ('failed', 'Failed'), ('refunded', 'Refunded')]),
+        ),
+        migrations.AlterField(
+            model_name='subscription',
+            name='plan_type',
+            field=models.TextField(choices=[('monthly', 'Monthly Premium'), ('quarterly', 'Quarterly Premium'), ('yearly', 'Yearly Premium')]),
+        ),
+        migrations.AlterField(
+            model_name='subscription',
+            name='status',
+            field=models.TextField(choices=[('active', 'Active'), ('expired', 'Expired'), ('cancelled', 'Cancelled'), ('pending', 'Pending')]),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='avatar',
+            field=models.FileField(blank=True, null=True, upload_to='media/avatars/'),
+        ),
+        migrations.CreateModel(
+            name='Donation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(blank=True, max_length=100, null=True)),
+                ('message', models.TextField(blank=True, null=True)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='donations', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-amount', '-created_at'],
+            },
+        ),
+    ]
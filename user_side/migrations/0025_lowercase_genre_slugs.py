@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-16 10:05
+
+from django.db import migrations
+from django.db.models.functions import Lower
+
+
+def lowercase_genre_slugs(apps, schema_editor):
+    Genre = apps.get_model('user_side', 'Genre')
+    max_length = Genre._meta.get_field('slug').max_length
+    mixed_case = Genre.objects.exclude(slug=Lower('slug')).values_list('pk', 'slug')
+    for pk, slug in list(mixed_case):
+        new_slug = slug.lower()
+        # Same rule as 0020: a row that would collide gets a pk suffix.
+        if Genre.objects.filter(slug=new_slug).exclude(pk=pk).exists():
+            suffix = f'-{pk}'
+            new_slug = new_slug[:max_length - len(suffix)] + suffix
+            if Genre.objects.filter(slug=new_slug).exclude(pk=pk).exists():
+                raise RuntimeError(f"Cannot lowercase Genre slug {slug!r}: {new_slug!r} is taken as well")
+        Genre.objects.filter(pk=pk).update(slug=new_slug)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_side', '0024_alter_adimpression_options_alter_episode_options_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_genre_slugs, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,13 @@
-from django.utils import timezone
-from django.db.models import F
+import hashlib
+from django.core.cache import cache
 from .models import AnonymousSession
-from rest_framework import generics
+from rest_framework import generics, status
+from rest_framework.response import Response
+from rest_framework.relations import ManyRelatedField, RelatedField
+from rest_framework.serializers import ListSerializer
+from django.core.exceptions import FieldDoesNotExist
 from .base_response import success_response, not_found_response
+from .caching import CATALOG_CACHE_NAMESPACE, CATALOG_CACHE_TIMEOUT, get_cache_version
 
 
 class AnonymousSessionTrackingMixin:
@@ -13,6 +18,23 @@ class AnonymousSessionTrackingMixin:
             return x_forwarded_for.split(',')[0].strip()
         return request.META.get('REMOTE_ADDR', '')
 
+    def get_client_meta(self):
+        """
+        (ip, user agent, country) for the current request, parsed once and
+        kept on the request. Reads request.META directly rather than going
+        through the case-insensitive request.headers wrapper.
+        """
+        request = self.request
+        client_meta = getattr(request, '_client_meta', None)
+        if client_meta is None:
+            client_meta = (
+                self.get_client_ip(),
+                request.META.get('HTTP_USER_AGENT', 'unknown'),
+                request.META.get('HTTP_X_COUNTRY', 'UZ'),
+            )
+            request._client_meta = client_meta
+        return client_meta
+
     def track_anonymous_session(self):
         request = self.request
         
@@ -23,34 +45,144 @@ class AnonymousSessionTrackingMixin:
         if not session_token:
             return None
         
-        anon_session, created = AnonymousSession.objects.get_or_create(
-            session_token=session_token,
-            defaults={
-                'fingerprint_hash': request.headers.get('X-Fingerprint', ''),
-                'ip_address': self.get_client_ip(),
-                'country': request.headers.get('X-Country', 'UZ'),
-                'city': request.headers.get('X-City', ''),
-                'first_seen_at': timezone.now(),
-                'last_seen_at': timezone.now(),
-                'total_visits': 1,
-            }
+        ip_address, _, country = self.get_client_meta()
+        return AnonymousSession.objects.record_visit(
+            session_token,
+            fingerprint_hash=request.headers.get('X-Fingerprint', ''),
+            ip_address=ip_address,
+            country=country,
+            city=request.headers.get('X-City', ''),
         )
-        
-        if not created:
-            anon_session.total_visits = F('total_visits') + 1
-            anon_session.last_seen_at = timezone.now()
-            anon_session.save(update_fields=['total_visits', 'last_seen_at'])
-            anon_session.refresh_from_db()
-        
-        return anon_session
 
     def get_user_or_session(self):
-        if self.request.user.is_authenticated:
-            return self.request.user, None
-        return None, self.track_anonymous_session()
+        # The view instance lives for one request, so the session upsert runs once.
+        user_session = getattr(self, '_user_session', None)
+        if user_session is None:
+            if self.request.user.is_authenticated:
+                user_session = (self.request.user, None)
+            else:
+                user_session = (None, self.track_anonymous_session())
+            self._user_session = user_session
+        return user_session
     
 
 
+class SerializerContextMixin:
+    def get_serializer_context(self):
+        # Built once per request; nested serializers share it through self.context.
+        context = getattr(self, '_serializer_context', None)
+        if context is None:
+            request = self.request
+            context = super().get_serializer_context()
+            context['abs_base'] = request.build_absolute_uri('/').rstrip('/')
+            context['user_id'] = request.user.id if request.user.is_authenticated else None
+            self._serializer_context = context
+        return context
+
+
+def serializer_related_lookups(serializer_class):
+    """
+    Return (select_related, prefetch_related) lookups for the relations a
+    serializer reads: dotted sources and nested serializers through forward
+    FKs are joined, anything crossing a to-many relation is prefetched.
+    Related fields rendered as a bare pk need neither.
+    """
+    model = serializer_class.Meta.model
+    select_related, prefetch_related = [], []
+    for field in serializer_class().fields.values():
+        if field.write_only or field.source == '*':
+            continue
+        if isinstance(field, RelatedField) and field.use_pk_only_optimization():
+            continue
+
+        path, opts = [], model._meta
+        to_many = isinstance(field, (ListSerializer, ManyRelatedField))
+        for attr in field.source.split('.'):
+            try:
+                model_field = opts.get_field(attr)
+            except FieldDoesNotExist:
+                break
+            if not model_field.is_relation:
+                break
+            path.append(attr)
+            to_many = to_many or model_field.many_to_many or model_field.one_to_many
+            opts = model_field.related_model._meta
+
+        if path:
+            lookups = prefetch_related if to_many else select_related
+            lookups.append('__'.join(path))
+    return tuple(select_related), tuple(prefetch_related)
+
+
+class SerializerRelatedFieldsMixin:
+    """
+    Works out the select_related/prefetch_related lookups for serializer_class
+    once, when the view class is defined, instead of on every request.
+    Views that build their own queryset call optimize_queryset() on it.
+    """
+    select_related_fields = ()
+    prefetch_related_fields = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        serializer_class = cls.__dict__.get('serializer_class')
+        if serializer_class is not None:
+            cls.select_related_fields, cls.prefetch_related_fields = serializer_related_lookups(serializer_class)
+
+    def optimize_queryset(self, queryset):
+        if self.select_related_fields:
+            queryset = queryset.select_related(*self.select_related_fields)
+        if self.prefetch_related_fields:
+            queryset = queryset.prefetch_related(*self.prefetch_related_fields)
+        return queryset
+
+    def get_queryset(self):
+        return self.optimize_queryset(super().get_queryset())
+
+
+class CachedRetrieveMixin:
+    cache_namespace = CATALOG_CACHE_NAMESPACE
+    cache_timeout = CATALOG_CACHE_TIMEOUT
+
+    def get_cached_data(self, instance, build):
+        # Absolute media URLs depend on the requested host, so it is part of the key.
+        version = get_cache_version(self.cache_namespace)
+        base_url = self.request.build_absolute_uri('/')
+        key = f"{self.cache_namespace}:{instance._meta.model_name}:{instance.pk}:{version}:{base_url}"
+        return cache.get_or_set(key, build, self.cache_timeout)
+
+
+class CachedListMixin:
+    """
+    Caches successful anonymous list responses per catalog version and query
+    string. Authenticated requests always hit the database.
+    """
+    cache_namespace = CATALOG_CACHE_NAMESPACE
+    cache_timeout = CATALOG_CACHE_TIMEOUT
+
+    def get_list_cache_key(self):
+        request = self.request
+        version = get_cache_version(self.cache_namespace)
+        query = hashlib.sha1(request.GET.urlencode().encode()).hexdigest()
+        # Pagination links are absolute, so the host is part of the key.
+        base_url = request.build_absolute_uri('/')
+        return f"{self.cache_namespace}:{type(self).__name__}:{version}:{base_url}:{query}"
+
+    def get_cached_response(self, build):
+        if self.request.user.is_authenticated:
+            return build()
+
+        key = self.get_list_cache_key()
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = build()
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, self.cache_timeout)
+        return response
+
+
 class PaginatedResponseMixin:
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
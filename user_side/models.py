@@ -1,9 +1,11 @@
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
 from django.db.models import Sum, Count, F, Value, DecimalField
-from django.db import models
+from django.db import connections, models
 from django.utils import timezone
 from moviepy.video.io.VideoFileClip import VideoFileClip
 from django.db.models.functions import Coalesce
+import logging
+logger = logging.getLogger(__name__)
 
 class UserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
@@ -49,6 +51,44 @@ class User(AbstractBaseUser, PermissionsMixin):
     def __str__(self):
         return f"{self.full_name} ({self.email})"
 
+class AnonymousSessionManager(models.Manager):
+    def record_visit(self, session_token, **defaults):
+        """
+        Create the session or bump its visit counter in a single
+        INSERT ... ON CONFLICT DO UPDATE ... RETURNING statement.
+        """
+        connection = connections[self.db]
+        qn = connection.ops.quote_name
+        meta = self.model._meta
+        table = qn(meta.db_table)
+
+        now = timezone.now()
+        values = {
+            'session_token': session_token,
+            'first_seen_at': now,
+            'last_seen_at': now,
+            'total_visits': 1,
+            **defaults,
+        }
+        fields = [field for field in meta.concrete_fields if not field.primary_key]
+        columns = ', '.join(qn(field.column) for field in fields)
+        placeholders = ', '.join(['%s'] * len(fields))
+        params = [
+            field.get_db_prep_save(values[field.name] if field.name in values else field.get_default(), connection)
+            for field in fields
+        ]
+
+        last_seen = qn(meta.get_field('last_seen_at').column)
+        visits = qn(meta.get_field('total_visits').column)
+        sql = (
+            f"INSERT INTO {table} ({columns}) VALUES ({placeholders}) "
+            f"ON CONFLICT ({qn(meta.get_field('session_token').column)}) DO UPDATE SET "
+            f"{last_seen} = EXCLUDED.{last_seen}, {visits} = {table}.{visits} + 1 "
+            f"RETURNING *"
+        )
+        return next(iter(self.raw(sql, params)))
+
+
 class AnonymousSession(models.Model):
     session_token = models.CharField(max_length=100)
     fingerprint_hash = models.TextField()
@@ -59,6 +99,8 @@ class AnonymousSession(models.Model):
     last_seen_at = models.DateTimeField()
     total_visits = models.IntegerField()
 
+    objects = AnonymousSessionManager()
+
     class Meta:
         constraints = [
             models.UniqueConstraint(fields=['session_token'], name='anonymoussession_session_token_unique')
@@ -78,6 +120,10 @@ class Genre(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        self.slug = self.slug.lower()
+        super().save(*args, **kwargs)
+
     class Meta:
         constraints = [
             models.UniqueConstraint(fields=['name'], name='genre_name_unique'),
@@ -98,6 +144,7 @@ class Anime(models.Model):
         ('HIATUS', 'Hiatus'),
         ('CANCELLED', 'Cancelled'),
     )
+    SEARCH_FIELDS = ('title', 'english_title', 'russian_title', 'uzbek_title', 'description', 'type', 'status', 'season')
     title = models.CharField(max_length=50)
     slug = models.SlugField(unique=True)
     english_title = models.CharField(max_length=50)
@@ -118,6 +165,7 @@ class Anime(models.Model):
     total_favorites = models.IntegerField(default=0)
     views_count = models.PositiveBigIntegerField(default=0, db_index=True)
     total_likes = models.IntegerField(default=0)
+    total_dislikes = models.IntegerField(default=0)
     total_comments = models.IntegerField(default=0)
     is_premium_only = models.BooleanField(default=False) 
     is_published = models.BooleanField(default=False)  
@@ -125,10 +173,19 @@ class Anime(models.Model):
     genres = models.ManyToManyField(Genre, related_name='animes') 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now_add=True)
+    # Casefolded SEARCH_FIELDS in one column, so ?search= is one LIKE per term.
+    # On PostgreSQL a pg_trgm GIN index (migration 0023) serves the search LIKEs.
+    search_text = models.TextField(blank=True, default='', editable=False)
 
     class Meta:
         indexes = [
             models.Index(fields=['title', 'english_title', 'uzbek_title', 'type', 'status', 'release_year', 'is_premium_only', 'created_at', 'updated_at'], name='anime_name_idx'),
+            models.Index(fields=['is_published', 'published_at'], name='anime_published_at_idx'),
+            models.Index(
+                fields=['-created_at'],
+                condition=models.Q(is_published=True),
+                name='anime_published_created_idx'
+            ),
         ]
         constraints = [
             models.UniqueConstraint(fields=['slug'], name='anime_slug_unique')
@@ -137,6 +194,17 @@ class Anime(models.Model):
     def __str__(self):
         return f"{self.title} ({self.release_year}) - {self.get_status_display()}"
 
+    def build_search_text(self):
+        return '\n'.join(str(getattr(self, field) or '') for field in self.SEARCH_FIELDS).casefold()
+
+    def save(self, *args, **kwargs):
+        self.slug = self.slug.lower()
+        self.search_text = self.build_search_text()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not set(update_fields).isdisjoint(self.SEARCH_FIELDS):
+            kwargs['update_fields'] = {*update_fields, 'search_text'}
+        super().save(*args, **kwargs)
+
 class Episode(models.Model):
     anime = models.ForeignKey(Anime, on_delete=models.CASCADE, related_name='episodes')
     episode_number = models.IntegerField()
@@ -145,6 +213,7 @@ class Episode(models.Model):
     slug = models.SlugField(unique=True)
     description = models.TextField()
     total_likes = models.IntegerField(default=0)
+    total_dislikes = models.IntegerField(default=0)
     thumbnail_url = models.FileField(upload_to='media/episodes/thumbnails/')
     duration_seconds = models.BigIntegerField(blank=True, null=True)
     air_date = models.DateTimeField()
@@ -158,11 +227,22 @@ class Episode(models.Model):
         constraints = [
             models.UniqueConstraint(fields=['anime', 'episode_number'], name='episode_number_unique_per_anime')
         ]
+        indexes = [
+            models.Index(
+                fields=['anime', 'episode_number'],
+                condition=models.Q(is_published=True),
+                name='episode_published_number_idx'
+            ),
+        ]
         ordering = ['anime', 'episode_number']
 
     def __str__(self):
         return f"{self.anime.title} - Ep {self.episode_number}: {self.title}"
 
+    def save(self, *args, **kwargs):
+        self.slug = self.slug.lower()
+        super().save(*args, **kwargs)
+
 class EpisodeLanguage(models.Model):
     LANGUAGE_CHOICES = [
         ('uzbek', 'O\'zbek tili'),
@@ -210,16 +290,30 @@ class EpisodeLanguage(models.Model):
                     self.episode.duration_seconds = int(duration)
                     self.episode.save(update_fields=['duration_seconds'])
             except Exception as e:
-                print(f"Error processing video: {e}")  
+                logger.warning("Error processing video %s: %s", self.video_url.name, e)
                 self.file_size_mb = 0  
             super().save(update_fields=['file_size_mb'])
 
 
+def build_owner_key(user_id=None, anonymous_session_id=None):
+    """
+    Single-column owner of a row that belongs to either a user or an
+    anonymous session, so lookups and uniqueness work on one indexed value.
+    Ownerless rows get None; NULLs never collide in the unique constraints.
+    """
+    if user_id is not None:
+        return f'u:{user_id}'
+    if anonymous_session_id is not None:
+        return f's:{anonymous_session_id}'
+    return None
+
+
 class WatchHistory(models.Model):
     user = models.ForeignKey('User', on_delete=models.CASCADE, null=True, blank=True)
     anonymous_session = models.ForeignKey('AnonymousSession', on_delete=models.CASCADE, null=True, blank=True)
     anime = models.ForeignKey('Anime', on_delete=models.CASCADE)
     episode = models.ForeignKey('Episode', on_delete=models.CASCADE)
+    owner_key = models.CharField(max_length=64, null=True, editable=False)
     watch_duration_seconds = models.IntegerField(null=True, blank=True) 
     completed = models.BooleanField(default=False, null=True, blank=True)  
     watched_at = models.DateTimeField()
@@ -237,19 +331,11 @@ class WatchHistory(models.Model):
                 name='watch_history_user_or_session'
             ),
             models.UniqueConstraint(
-                fields=['user', 'anime', 'episode'],
-                condition=models.Q(user__isnull=False),
-                name='unique_user_anime_episode'
-            ),
-            models.UniqueConstraint(
-                fields=['anonymous_session', 'anime', 'episode'],
-                condition=models.Q(anonymous_session__isnull=False),
-                name='unique_session_anime_episode'
+                fields=['owner_key', 'anime', 'episode'],
+                name='unique_owner_anime_episode'
             )
         ]
         indexes = [
-            models.Index(fields=['user', 'anime', 'episode']),
-            models.Index(fields=['anonymous_session', 'anime', 'episode']),
             models.Index(fields=['anime', 'watched_at']),
             models.Index(fields=['episode', 'watched_at'])
         ]
@@ -262,6 +348,7 @@ class WatchHistory(models.Model):
     def save(self, *args, **kwargs):
         if not self.watched_at:
             self.watched_at = timezone.now()
+        self.owner_key = build_owner_key(self.user_id, self.anonymous_session_id)
         super().save(*args, **kwargs)
 
 
@@ -270,6 +357,7 @@ class Like(models.Model):
     anonymous_session = models.ForeignKey('AnonymousSession', on_delete=models.CASCADE, null=True, blank=True)
     anime = models.ForeignKey('Anime', on_delete=models.CASCADE, null=True, blank=True)
     episode = models.ForeignKey('Episode', on_delete=models.CASCADE, null=True, blank=True)
+    owner_key = models.CharField(max_length=64, null=True, editable=False)
     is_like = models.BooleanField(default=True)  
     
     created_at = models.DateTimeField(auto_now_add=True)
@@ -277,25 +365,16 @@ class Like(models.Model):
 
     class Meta:
         constraints = [
+            # Episode likes leave anime empty, so each target gets its own constraint.
             models.UniqueConstraint(
-                fields=['user', 'anime'],
-                condition=models.Q(user__isnull=False, anime__isnull=False, episode__isnull=True),
-                name='unique_user_anime_like'
+                fields=['owner_key', 'anime'],
+                condition=models.Q(anime__isnull=False, episode__isnull=True),
+                name='unique_owner_anime_like'
             ),
             models.UniqueConstraint(
-                fields=['user', 'episode'],
-                condition=models.Q(user__isnull=False, episode__isnull=False),
-                name='unique_user_episode_like'
-            ),
-            models.UniqueConstraint(
-                fields=['anonymous_session', 'anime'],
-                condition=models.Q(anonymous_session__isnull=False, anime__isnull=False, episode__isnull=True),
-                name='unique_anon_anime_like'
-            ),
-            models.UniqueConstraint(
-                fields=['anonymous_session', 'episode'],
-                condition=models.Q(anonymous_session__isnull=False, episode__isnull=False),
-                name='unique_anon_episode_like'
+                fields=['owner_key', 'episode'],
+                condition=models.Q(episode__isnull=False),
+                name='unique_owner_episode_like'
             ),
         ]
         indexes = [
@@ -309,6 +388,10 @@ class Like(models.Model):
         reaction = "👍 Liked" if self.is_like else "👎 Disliked"
         return f"{user_str} {reaction} {target}"
 
+    def save(self, *args, **kwargs):
+        self.owner_key = build_owner_key(self.user_id, self.anonymous_session_id)
+        super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
@@ -329,6 +412,16 @@ class Comment(models.Model):
             models.Index(fields=['anime', 'is_approved', '-created_at']),
             models.Index(fields=['episode', 'is_approved', '-created_at']),
             models.Index(fields=['parent', '-created_at']),
+            models.Index(
+                fields=['anime', '-created_at'],
+                condition=models.Q(is_approved=True, parent__isnull=True),
+                name='comment_anime_root_idx'
+            ),
+            models.Index(
+                fields=['episode', '-created_at'],
+                condition=models.Q(is_approved=True, parent__isnull=True),
+                name='comment_episode_root_idx'
+            ),
         ]
 
     def __str__(self):
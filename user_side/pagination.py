@@ -0,0 +1,13 @@
+from rest_framework.pagination import CursorPagination
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Keyset pagination for feeds ordered newest first. Pages are an index range
+    scan instead of OFFSET, and no COUNT(*) is issued.
+    """
+    ordering = '-created_at'
+
+
+class EpisodeNumberCursorPagination(CursorPagination):
+    ordering = 'episode_number'
@@ -0,0 +1,23 @@
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+_encode_default = JSONEncoder().default
+
+
+class OrjsonRenderer(JSONRenderer):
+    """
+    JSONRenderer backed by orjson. Types orjson does not handle natively
+    (Decimal, lazy translation strings, querysets, ...) fall back to DRF's encoder.
+    """
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        options = self.options
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            options |= orjson.OPT_INDENT_2
+
+        return orjson.dumps(data, default=_encode_default, option=options)
@@ -1,10 +1,73 @@
 from rest_framework import serializers
 from rest_framework.serializers import Serializer, IntegerField, BooleanField
-from django.contrib.auth.hashers import make_password, check_password
+from rest_framework.fields import SkipField
+from rest_framework.relations import PKOnlyObject
+from django.db import models
+from django.db.models import F, Prefetch, Window
+from django.db.models.functions import RowNumber
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import make_password
 from .models import *
 from django.core.exceptions import ValidationError
 from django.core.files.images import get_image_dimensions
 
+
+def absolute_file_url(file, context):
+    if not file:
+        return None
+    # List views put the request's scheme://host in the context once, so the
+    # common case is a plain concatenation instead of build_absolute_uri().
+    abs_base = context.get('abs_base')
+    if abs_base is not None:
+        url = file.url
+        if url.startswith('/') and not url.startswith('//'):
+            return f"{abs_base}{url}"
+    request = context.get('request')
+    if request:
+        return request.build_absolute_uri(file.url)
+    return None
+
+
+class AbsoluteFileField(serializers.FileField):
+    """
+    Read-only file field rendered as an absolute URL, or None without a request.
+    """
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return absolute_file_url(value, self.context)
+
+
+class FastListSerializer(serializers.ListSerializer):
+    """
+    Same output as ListSerializer, but the child's readable fields are resolved once
+    per list instead of once per row.
+    """
+    def to_representation(self, data):
+        if type(self.child).to_representation is not Serializer.to_representation:
+            return super().to_representation(data)
+
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        fields = [
+            (field.field_name, field.get_attribute, field.to_representation)
+            for field in self.child._readable_fields
+        ]
+
+        ret = []
+        for item in iterable:
+            row = {}
+            for field_name, get_attribute, to_representation in fields:
+                try:
+                    attribute = get_attribute(item)
+                except SkipField:
+                    continue
+                check_for_none = attribute.pk if isinstance(attribute, PKOnlyObject) else attribute
+                row[field_name] = None if check_for_none is None else to_representation(attribute)
+            ret.append(row)
+        return ret
+
 class RegisterSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
@@ -20,33 +83,29 @@ class LoginSerializer(serializers.Serializer):
     password = serializers.CharField(write_only=True)
 
     def validate(self, data):
-        try:
-            user = User.objects.get(email=data['email'])
-        except User.DoesNotExist:
-            raise serializers.ValidationError("Invalid credentials")
-
-        if not check_password(data['password'], user.password):
+        # ModelBackend runs the hasher for unknown emails too (no timing oracle),
+        # rejects inactive users and upgrades hashes from older hashers on success.
+        user = authenticate(
+            request=self.context.get('request'),
+            email=data['email'],
+            password=data['password']
+        )
+        if user is None:
             raise serializers.ValidationError("Invalid credentials")
 
         data['user'] = user
         return data
 
 class SimpleAnimeSerializer(serializers.ModelSerializer):
-    poster_url = serializers.SerializerMethodField()
+    poster_url = AbsoluteFileField()
     
     class Meta:
         model = Anime
         fields = ['id', 'slug', 'title', 'english_title', 'russian_title', 'uzbek_title', 'poster_url', 'rating', 'total_episodes', 'release_year']
-    
-    def get_poster_url(self, obj):
-        request = self.context.get('request')
-        if obj.poster_url and request:
-            return request.build_absolute_uri(obj.poster_url.url)
-        return None
 
 class UserSerializer(serializers.ModelSerializer):
     avatar = serializers.FileField(required=False, allow_null=True)  
-    avatar_url = serializers.SerializerMethodField() 
+    avatar_url = AbsoluteFileField(source='avatar')
     liked_animes = serializers.SerializerMethodField()
     favorite_animes = serializers.SerializerMethodField()
     recent_watch_history = serializers.SerializerMethodField()
@@ -71,12 +130,6 @@ class UserSerializer(serializers.ModelSerializer):
             'is_premium': {'read_only': True},
         }
 
-    def get_avatar_url(self, obj):
-        request = self.context.get('request')
-        if obj.avatar and request:
-            return request.build_absolute_uri(obj.avatar.url)
-        return None
-
     def get_liked_animes(self, obj):
         likes = Like.objects.filter(
             user=obj, 
@@ -153,7 +206,7 @@ class GenreSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'name_ru', 'slug']
 
 class EpisodeLanguageSerializer(serializers.ModelSerializer):
-    video_url = serializers.SerializerMethodField()
+    video_url = AbsoluteFileField()
     
     class Meta:
         model = EpisodeLanguage
@@ -161,16 +214,41 @@ class EpisodeLanguageSerializer(serializers.ModelSerializer):
             'id', 'language', 'video_url', 'video_quality', 
             'file_size_mb', 'is_default'
         ]
-    
-    def get_video_url(self, obj):
-        request = self.context.get('request')
-        if obj.video_url and request:
-            return request.build_absolute_uri(obj.video_url.url)
-        return None
+
+def languages_prefetch():
+    """
+    Prefetch for Episode.languages limited to the columns EpisodeLanguageSerializer reads.
+    """
+    return Prefetch(
+        'languages',
+        queryset=EpisodeLanguage.objects.only(
+            'id', 'language', 'video_url', 'video_quality', 'file_size_mb', 'is_default', 'episode_id'
+        )
+    )
+
+def first_episode_prefetch():
+    """
+    Prefetch each anime's lowest-numbered published episode into `first_episodes`,
+    ranked per anime with ROW_NUMBER() so a page of anime costs one query.
+    """
+    ranked = Episode.objects.filter(is_published=True).only(
+        'id', 'anime', 'episode_number', 'title', 'title_ru', 'slug', 'thumbnail_url',
+        'duration_seconds', 'air_date', 'is_premium_only'
+    ).annotate(
+        episode_rank=Window(
+            RowNumber(),
+            partition_by=F('anime_id'),
+            order_by=F('episode_number').asc()
+        )
+    ).filter(episode_rank=1).prefetch_related(languages_prefetch())
+    return Prefetch('episodes', queryset=ranked, to_attr='first_episodes')
+
+def anime_prefetches():
+    return ['genres', first_episode_prefetch()]
 
 class FirstEpisodeSerializer(serializers.ModelSerializer):
     languages = serializers.SerializerMethodField()
-    thumbnail_url = serializers.SerializerMethodField()
+    thumbnail_url = AbsoluteFileField()
     
     class Meta:
         model = Episode
@@ -179,27 +257,19 @@ class FirstEpisodeSerializer(serializers.ModelSerializer):
             'duration_seconds', 'air_date', 'is_premium_only', 'languages'
         ]
     
-    def get_thumbnail_url(self, obj):
-        request = self.context.get('request')
-        if obj.thumbnail_url and request:
-            return request.build_absolute_uri(obj.thumbnail_url.url)
-        return None
-    
     def get_languages(self, obj):
-        request = self.context.get('request')
-        episode_languages = EpisodeLanguage.objects.filter(episode=obj)
         return EpisodeLanguageSerializer(
-            episode_languages, 
+            obj.languages.all(), 
             many=True, 
-            context={'request': request}
+            context=self.context
         ).data
 
 class AnimeSerializer(serializers.ModelSerializer):
     genres = GenreSerializer(many=True, read_only=True)
     first_episode = serializers.SerializerMethodField()
-    poster_url = serializers.SerializerMethodField()
-    banner_url = serializers.SerializerMethodField()
-    trailer_url = serializers.SerializerMethodField()
+    poster_url = AbsoluteFileField()
+    banner_url = AbsoluteFileField()
+    trailer_url = AbsoluteFileField()
     title = serializers.CharField()
     english_title = serializers.CharField()
     uzbek_title = serializers.CharField()
@@ -217,36 +287,22 @@ class AnimeSerializer(serializers.ModelSerializer):
             'total_views', 'total_likes', 'is_premium_only', 'is_published', 'published_at',
             'created_at', 'updated_at', 'genres', 'first_episode'
         ]
-    
-    def get_poster_url(self, obj):
-        request = self.context.get('request')
-        if obj.poster_url and request:
-            return request.build_absolute_uri(obj.poster_url.url)
-        return None
-    
-    def get_banner_url(self, obj):
-        request = self.context.get('request')
-        if obj.banner_url and request:
-            return request.build_absolute_uri(obj.banner_url.url)
-        return None
-    
-    def get_trailer_url(self, obj):
-        request = self.context.get('request')
-        if obj.trailer_url and request:
-            return request.build_absolute_uri(obj.trailer_url.url)
-        return None
+        list_serializer_class = FastListSerializer
 
     def get_first_episode(self, obj):
-        request = self.context.get('request')
-        first_episode = Episode.objects.filter(
-            anime=obj, 
-            is_published=True
-        ).order_by('episode_number').first()
+        first_episodes = getattr(obj, 'first_episodes', None)
+        if first_episodes is not None:
+            first_episode = first_episodes[0] if first_episodes else None
+        else:
+            first_episode = Episode.objects.filter(
+                anime=obj, 
+                is_published=True
+            ).order_by('episode_number').first()
         
         if first_episode:
             return FirstEpisodeSerializer(
                 first_episode, 
-                context={'request': request}
+                context=self.context
             ).data
         return None
 
@@ -256,7 +312,7 @@ class AnonymousSessionSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 class EpisodeSerializer(serializers.ModelSerializer):
-    thumbnail_url = serializers.SerializerMethodField()
+    thumbnail_url = AbsoluteFileField()
     anime_title = serializers.CharField(source='anime.title', read_only=True)
     languages = serializers.SerializerMethodField()
     title = serializers.CharField()
@@ -271,23 +327,15 @@ class EpisodeSerializer(serializers.ModelSerializer):
             'languages'
         ]
 
-    def get_thumbnail_url(self, obj):
-        request = self.context.get('request')
-        if obj.thumbnail_url and request:
-            return request.build_absolute_uri(obj.thumbnail_url.url)
-        return None
-
     def get_languages(self, obj):
-        request = self.context.get('request')
-        episode_languages = EpisodeLanguage.objects.filter(episode=obj)
         return EpisodeLanguageSerializer(
-            episode_languages,
+            obj.languages.all(),
             many=True,
-            context={'request': request}
+            context=self.context
         ).data
 
 class EpisodeDetailSerializer(serializers.ModelSerializer):
-    thumbnail_url = serializers.SerializerMethodField()
+    thumbnail_url = AbsoluteFileField()
     languages = serializers.SerializerMethodField()
     anime = serializers.SerializerMethodField()
     next_episode = serializers.SerializerMethodField()
@@ -304,19 +352,11 @@ class EpisodeDetailSerializer(serializers.ModelSerializer):
             'anime', 'next_episode', 'previous_episode'
         ]
 
-    def get_thumbnail_url(self, obj):
-        request = self.context.get('request')
-        if obj.thumbnail_url and request:
-            return request.build_absolute_uri(obj.thumbnail_url.url)
-        return None
-
     def get_languages(self, obj):
-        request = self.context.get('request')
-        episode_languages = EpisodeLanguage.objects.filter(episode=obj)
         return EpisodeLanguageSerializer(
-            episode_languages,
+            obj.languages.all(),
             many=True,
-            context={'request': request}
+            context=self.context
         ).data
 
     def get_anime(self, obj):
@@ -324,7 +364,7 @@ class EpisodeDetailSerializer(serializers.ModelSerializer):
             'id': obj.anime.id,
             'title': obj.anime.title,
             'slug': obj.anime.slug,
-            'poster_url': self.context['request'].build_absolute_uri(obj.anime.poster_url.url) if obj.anime.poster_url else None
+            'poster_url': absolute_file_url(obj.anime.poster_url, self.context)
         }
 
     def get_next_episode(self, obj):
@@ -370,6 +410,10 @@ class GenreSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'name_ru', 'slug', 'description', 'anime_count', 'created_at']
     
     def get_anime_count(self, obj):
+        # GenreListView annotates the count so the page needs no per-genre query.
+        anime_count = getattr(obj, 'published_anime_count', None)
+        if anime_count is not None:
+            return anime_count
         return obj.animes.filter(is_published=True).count()
 
 class GenreDetailSerializer(serializers.ModelSerializer):
@@ -384,7 +428,6 @@ class GenreDetailSerializer(serializers.ModelSerializer):
         return obj.animes.filter(is_published=True).count()
     
     def get_top_animes(self, obj):
-        request = self.context.get('request')
         top_animes = obj.animes.filter(is_published=True).order_by('-rating', '-total_views')[:5]
         
         return [{
@@ -393,7 +436,7 @@ class GenreDetailSerializer(serializers.ModelSerializer):
             'slug': anime.slug,
             'rating': anime.rating,
             'total_views': anime.total_views,
-            'poster_url': request.build_absolute_uri(anime.poster_url.url) if anime.poster_url and request else None
+            'poster_url': absolute_file_url(anime.poster_url, self.context)
         } for anime in top_animes]
 
 class WatchHistorySerializer(serializers.ModelSerializer):
@@ -450,7 +493,11 @@ class CommentSerializer(serializers.ModelSerializer):
         if not request:
             return False
         
-        if request.user.is_authenticated and obj.user == request.user:
+        if 'user_id' in self.context:
+            user_id = self.context['user_id']
+        else:
+            user_id = request.user.id if request.user.is_authenticated else None
+        if user_id is not None and obj.user_id == user_id:
             return True
         anon_session = request.session.get('anonymous_session_id')
         if anon_session and obj.anonymous_session_id == anon_session:
@@ -502,20 +549,13 @@ class FavoriteSerializer(serializers.ModelSerializer):
     
 
 class DonationSerializer(serializers.ModelSerializer):
-    avatar = serializers.SerializerMethodField()
+    avatar = AbsoluteFileField(source='user.avatar', allow_null=True)
     email = serializers.SerializerMethodField()
-    username = serializers.SerializerMethodField()
 
     class Meta:
         model = Donation
         fields = ['id', 'name', 'avatar', 'email', 'message', 'amount', 'created_at']
 
-    def get_avatar(self, obj):
-        request = self.context.get('request')
-        if obj.avatar and request:
-            return request.build_absolute_uri(obj.avatar.url)
-        return None
-
     def get_email(self, obj):
         return obj.user.email if obj.user else None
 
@@ -0,0 +1,49 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from .caching import CATALOG_CACHE_NAMESPACE, bump_cache_version, published_anime_cache_key
+from .models import Anime, Comment, Episode, EpisodeLanguage, Genre
+from .tasks import adjust_anime_comments, adjust_episode_comments
+
+
+def invalidate_catalog_cache(sender, **kwargs):
+    bump_cache_version(CATALOG_CACHE_NAMESPACE)
+
+
+def invalidate_published_anime(sender, instance, **kwargs):
+    cache.delete_many([
+        published_anime_cache_key('id', instance.pk),
+        published_anime_cache_key('slug', instance.slug),
+    ])
+
+
+def _queue_comment_count(comment, delta):
+    if comment.episode_id:
+        transaction.on_commit(lambda: adjust_episode_comments.delay(comment.episode_id, delta))
+    elif comment.anime_id:
+        transaction.on_commit(lambda: adjust_anime_comments.delay(comment.anime_id, delta))
+
+
+def increment_comment_count(sender, instance, created, raw=False, **kwargs):
+    # Fixtures (raw saves) carry their own counter values.
+    if created and not raw:
+        _queue_comment_count(instance, 1)
+
+
+def decrement_comment_count(sender, instance, **kwargs):
+    """
+    Every deleted comment, replies removed by cascade included, takes one off
+    its episode or anime counter after the delete commits.
+    """
+    _queue_comment_count(instance, -1)
+
+
+for model in (Anime, Episode, EpisodeLanguage, Genre):
+    post_save.connect(invalidate_catalog_cache, sender=model, dispatch_uid=f'catalog_cache_save_{model.__name__}')
+    post_delete.connect(invalidate_catalog_cache, sender=model, dispatch_uid=f'catalog_cache_delete_{model.__name__}')
+
+m2m_changed.connect(invalidate_catalog_cache, sender=Anime.genres.through, dispatch_uid='catalog_cache_anime_genres')
+post_save.connect(invalidate_published_anime, sender=Anime, dispatch_uid='published_anime_save')
+post_delete.connect(invalidate_published_anime, sender=Anime, dispatch_uid='published_anime_delete')
+post_save.connect(increment_comment_count, sender=Comment, dispatch_uid='comment_count_save')
+post_delete.connect(decrement_comment_count, sender=Comment, dispatch_uid='comment_count_delete')
@@ -1,7 +1,15 @@
 from django.contrib.sitemaps import Sitemap
+from django.contrib.sitemaps.views import x_robots_tag
+from django.contrib.sites.shortcuts import get_current_site
+from django.core.paginator import EmptyPage, PageNotAnInteger
+from django.db.models import QuerySet
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import reverse
+from django.utils.html import escape
 from .models import Anime, Episode, Genre
 
+SITEMAP_CHUNK_SIZE = 2000
+
 class StaticViewSitemap(Sitemap):
     priority = 1.0
     changefreq = 'weekly'
@@ -17,30 +25,103 @@ class AnimeSitemap(Sitemap):
     priority = 0.9
 
     def items(self):
-        return Anime.objects.all()
+        return Anime.objects.filter(is_published=True).order_by('pk').values_list('pk', flat=True)
 
-    def location(self, obj):
-        return reverse('anime-detail', args=[obj.pk])
+    def location(self, pk):
+        return reverse('anime-detail', args=[pk])
 
 class EpisodeSitemap(Sitemap):
     changefreq = "weekly"
     priority = 0.7
 
     def items(self):
-        return Episode.objects.all()
+        return Episode.objects.filter(
+            is_published=True,
+            anime__is_published=True
+        ).order_by('pk').values_list('anime__slug', 'slug')
 
-    def location(self, obj):
-        return reverse(
-            'episode-detail',
-            args=[obj.anime.identifier, obj.identifier]
-        )
+    def location(self, item):
+        anime_slug, episode_slug = item
+        return reverse('episode-detail', args=[anime_slug, episode_slug])
 
 class GenreSitemap(Sitemap):
     changefreq = "monthly"
     priority = 0.6
 
     def items(self):
-        return Genre.objects.all()
+        return Genre.objects.order_by('pk').values_list('slug', flat=True)
+
+    def location(self, slug):
+        return reverse('genre-detail', args=[slug])
+
+
+def _iter_items(object_list):
+    if isinstance(object_list, QuerySet):
+        return object_list.iterator(chunk_size=SITEMAP_CHUNK_SIZE)
+    return iter(object_list)
+
+
+def _render_url(site, item, protocol, domain):
+    parts = [f"<url><loc>{escape(f'{protocol}://{domain}{site._location(item)}')}</loc>"]
+    lastmod = site._get('lastmod', item)
+    if lastmod:
+        parts.append(f"<lastmod>{lastmod:%Y-%m-%d}</lastmod>")
+    changefreq = site._get('changefreq', item)
+    if changefreq:
+        parts.append(f"<changefreq>{changefreq}</changefreq>")
+    priority = site._get('priority', item)
+    if priority is not None:
+        parts.append(f"<priority>{priority}</priority>")
+    parts.append("</url>")
+    return ''.join(parts)
+
+
+def _stream_urlset(pages):
+    yield (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9" '
+        'xmlns:xhtml="http://www.w3.org/1999/xhtml">\n'
+    )
+    for site, object_list, protocol, domain in pages:
+        buffer = []
+        for item in _iter_items(object_list):
+            buffer.append(_render_url(site, item, protocol, domain))
+            if len(buffer) >= SITEMAP_CHUNK_SIZE:
+                yield ''.join(buffer)
+                buffer = []
+        if buffer:
+            yield ''.join(buffer)
+    yield '\n</urlset>\n'
+
+
+@x_robots_tag
+def streaming_sitemap(request, sitemaps, section=None):
+    """
+    Drop-in for django.contrib.sitemaps.views.sitemap that streams the XML
+    while reading each page in chunks, so memory stays bounded by
+    SITEMAP_CHUNK_SIZE instead of the page size. Alternate-language links
+    are not rendered; none of our sitemaps use i18n.
+    """
+    if section is not None:
+        if section not in sitemaps:
+            raise Http404("No sitemap available for section: %r" % section)
+        maps = [sitemaps[section]]
+    else:
+        maps = sitemaps.values()
+    page = request.GET.get('p', 1)
+    req_site = get_current_site(request)
+
+    # Resolve every page up front so a bad ?p= is a 404, not a truncated stream.
+    pages = []
+    for site in maps:
+        if callable(site):
+            site = site()
+        try:
+            object_list = site.paginator.page(page).object_list
+        except EmptyPage:
+            raise Http404("Page %s empty" % page)
+        except PageNotAnInteger:
+            raise Http404("No page '%s'" % page)
+        pages.append((site, object_list, site.get_protocol(request.scheme), site.get_domain(req_site)))
 
-    def location(self, obj):
-        return reverse('genre-detail', args=[obj.identifier])
+    return StreamingHttpResponse(_stream_urlset(pages), content_type='application/xml')
@@ -0,0 +1,65 @@
+import logging
+from celery import shared_task
+from django.db import transaction
+from .counters import flush_views, increment_views
+from django.db.models import F
+from .models import Anime, Episode, WatchHistory, build_owner_key
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def record_watch(episode_id, anime_id, user_id=None, anonymous_session_id=None, meta=None):
+    """
+    Store the first view of an episode per user/session and bump the episode
+    and anime view counters. Requests with no owner only count the view.
+    """
+    if user_id is not None:
+        owner = {'user_id': user_id}
+    elif anonymous_session_id is not None:
+        owner = {'anonymous_session_id': anonymous_session_id}
+    else:
+        owner = None
+
+    with transaction.atomic():
+        created = True
+        if owner is not None:
+            # The owner_key unique constraint on WatchHistory makes this safe under races.
+            try:
+                _, created = WatchHistory.objects.get_or_create(
+                    owner_key=build_owner_key(user_id, anonymous_session_id),
+                    anime_id=anime_id,
+                    episode_id=episode_id,
+                    defaults={**owner, **(meta or {})}
+                )
+            except Exception as e:
+                created = False
+                logger.warning("Failed to create watch history: %s", e)
+
+        if created:
+            transaction.on_commit(lambda: increment_views(episode_id, anime_id))
+
+
+@shared_task(ignore_result=True)
+def flush_view_counters():
+    """Write the view counts buffered in redis back to the database."""
+    flush_views()
+
+
+def _adjust_counter(model, pk, field, delta):
+    model.objects.filter(pk=pk).update(**{field: F(field) + delta})
+
+
+@shared_task(ignore_result=True)
+def adjust_anime_comments(anime_id, delta):
+    _adjust_counter(Anime, anime_id, 'total_comments', delta)
+
+
+@shared_task(ignore_result=True)
+def adjust_episode_comments(episode_id, delta):
+    _adjust_counter(Episode, episode_id, 'total_comments', delta)
+
+
+@shared_task(ignore_result=True)
+def adjust_anime_favorites(anime_id, delta):
+    _adjust_counter(Anime, anime_id, 'total_favorites', delta)
@@ -2,10 +2,25 @@ from django import template
 
 register = template.Library()
 
+# Template arguments are constants, so each one is parsed to an int only once.
+_length_args = {}
+
 # Restore 'length_is' filter (removed from Django 5+)
 @register.filter
 def length_is(value, arg):
+    if isinstance(arg, int):
+        expected = arg
+    else:
+        try:
+            expected = _length_args[arg]
+        except KeyError:
+            try:
+                expected = _length_args.setdefault(arg, int(arg))
+            except (TypeError, ValueError):
+                return False
+        except TypeError:
+            return False
     try:
-        return len(value) == int(arg)
-    except Exception:
+        return len(value) == expected
+    except TypeError:
         return False
@@ -1,3 +1,403 @@
+from datetime import timedelta
+from importlib import import_module
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .counters import ANIME_VIEWS_KEY, EPISODE_VIEWS_KEY, apply_view_deltas, flush_views, get_redis, increment_views
+from .models import AnonymousSession, Anime, Comment, Donation, Episode, EpisodeLanguage, Genre, Like, User, WatchHistory
+from .views import _id_or_slug_filter
+
+
+def create_anime(index=0, **kwargs):
+    anime = Anime(
+        title=f'Naruto {index}',
+        slug=f'naruto-{index}',
+        english_title=f'Naruto {index}',
+        uzbek_title=f'Naruto {index}',
+        description='Ninja',
+        total_episodes=2,
+        duration_minutes=24,
+        release_year=2002,
+        season='spring',
+        is_published=True,
+        **kwargs,
+    )
+    anime.poster_url.name = f'anime/posters/naruto-{index}.jpg'
+    anime.save()
+    return anime
+
+
+def create_episode(anime, number=1, **kwargs):
+    episode = Episode(
+        anime=anime,
+        episode_number=number,
+        title=f'Episode {number}',
+        slug=f'{anime.slug}-e{number}',
+        description='Episode',
+        air_date=timezone.now(),
+        duration_seconds=1400,
+        is_published=True,
+        **kwargs,
+    )
+    episode.thumbnail_url.name = f'episodes/thumbnails/{anime.slug}-e{number}.jpg'
+    episode.save()
+    # bulk_create skips EpisodeLanguage.save(), which probes the video file.
+    EpisodeLanguage.objects.bulk_create([EpisodeLanguage(
+        episode=episode,
+        language='uzbek',
+        video_url=f'episodes/videos/{anime.slug}-e{number}.mp4',
+        file_size_mb='1',
+    )])
+    return episode
+
+
+class APITestCase(TestCase):
+    def setUp(self):
+        # Published anime and list responses are cached across requests.
+        cache.clear()
+        self.client = APIClient()
+        self.anime = create_anime()
+        self.episode = create_episode(self.anime)
+
+    def session_headers(self, token='session-token'):
+        return {'HTTP_X_SESSION_TOKEN': token}
+
+
+class MixedCaseSlugTests(APITestCase):
+    anime_slug = 'Naruto-0'
+    episode_slug = 'Naruto-0-E1'
+
+    def test_slugs_are_stored_lowercase(self):
+        anime = create_anime(1)
+        anime.slug = 'Naruto-Shippuden'
+        anime.save()
+        self.assertEqual(Anime.objects.get(pk=anime.pk).slug, 'naruto-shippuden')
+
+    def test_episode_list(self):
+        response = self.client.get(f'/api/animes/{self.anime_slug}/episodes/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([e['id'] for e in response.json()['data']], [self.episode.pk])
+
+    def test_episode_detail(self):
+        response = self.client.get(f'/api/animes/{self.anime_slug}/episodes/{self.episode_slug}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['id'], self.episode.pk)
+
+    def test_episode_watch(self):
+        response = self.client.post(
+            f'/api/animes/{self.anime_slug}/episodes/{self.episode_slug}/watch/',
+            {'watch_duration_seconds': 600}, format='json', **self.session_headers(),
+        )
+        self.assertIn(response.status_code, (200, 201))
+        self.assertTrue(WatchHistory.objects.filter(episode=self.episode).exists())
+
+    def test_anime_like(self):
+        response = self.client.post(
+            f'/api/animes/{self.anime_slug}/like/', {'is_like': True}, format='json', **self.session_headers(),
+        )
+        self.assertIn(response.status_code, (200, 201))
+        self.assertTrue(Like.objects.filter(anime=self.anime, episode__isnull=True).exists())
+
+    def test_episode_like(self):
+        response = self.client.post(
+            f'/api/animes/{self.anime_slug}/episodes/{self.episode_slug}/like/',
+            {'is_like': True}, format='json', **self.session_headers(),
+        )
+        self.assertIn(response.status_code, (200, 201))
+        self.assertTrue(Like.objects.filter(episode=self.episode).exists())
+
+    def test_anime_comments(self):
+        response = self.client.post(
+            f'/api/animes/{self.anime_slug}/comments/',
+            {'comment': 'Believe it', 'guest_name': 'Guest'}, format='json', **self.session_headers(),
+        )
+        self.assertEqual(response.status_code, 201)
+        # Guest comments wait for moderation before they are listed.
+        Comment.objects.update(is_approved=True)
+        response = self.client.get(f'/api/animes/{self.anime_slug}/comments/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 1)
+
+    def test_episode_comments(self):
+        response = self.client.post(
+            f'/api/animes/{self.anime_slug}/episodes/{self.episode_slug}/comments/',
+            {'comment': 'Believe it', 'guest_name': 'Guest'}, format='json', **self.session_headers(),
+        )
+        self.assertEqual(response.status_code, 201)
+        # Guest comments wait for moderation before they are listed.
+        Comment.objects.update(is_approved=True)
+        response = self.client.get(f'/api/animes/{self.anime_slug}/episodes/{self.episode_slug}/comments/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 1)
+
+    def test_favorite(self):
+        response = self.client.post(f'/api/animes/{self.anime_slug}/favorite/', {}, format='json', **self.session_headers())
+        self.assertIn(response.status_code, (200, 201))
+        response = self.client.delete(f'/api/animes/{self.anime_slug}/favorite/', **self.session_headers())
+        self.assertEqual(response.status_code, 200)
+
+
+class LowercaseSlugMigrationTests(TestCase):
+    def test_lowercase_slugs_suffixes_collisions(self):
+        lowercase_slugs = import_module('user_side.migrations.0020_lowercase_anime_episode_slugs').lowercase_slugs
+        anime = create_anime()
+        clash = create_anime(1)
+        Anime.objects.filter(pk=clash.pk).update(slug='Naruto-0')
+        mixed = create_anime(2)
+        Anime.objects.filter(pk=mixed.pk).update(slug='Naruto-Shippuden')
+
+        lowercase_slugs(apps, None)
+
+        self.assertEqual(Anime.objects.get(pk=anime.pk).slug, 'naruto-0')
+        self.assertEqual(Anime.objects.get(pk=clash.pk).slug, f'naruto-0-{clash.pk}')
+        self.assertEqual(Anime.objects.get(pk=mixed.pk).slug, 'naruto-shippuden')
+
+
+class CommentCounterTests(APITestCase):
+    def assertCounts(self, anime_comments, episode_comments):
+        self.anime.refresh_from_db()
+        self.episode.refresh_from_db()
+        self.assertEqual(
+            (self.anime.total_comments, self.episode.total_comments),
+            (anime_comments, episode_comments),
+        )
+
+    def post_comment(self, url, **data):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                url, {'comment': 'Believe it', 'guest_name': 'Guest', **data}, format='json', **self.session_headers(),
+            )
+        self.assertEqual(response.status_code, 201)
+        return response.json()['data']['id']
+
+    def test_api_create_and_delete(self):
+        anime_comment = self.post_comment('/api/animes/naruto-0/comments/')
+        episode_comment = self.post_comment('/api/animes/naruto-0/episodes/naruto-0-e1/comments/')
+        self.assertCounts(1, 1)
+
+        for comment_id in (anime_comment, episode_comment):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.delete(f'/api/comments/{comment_id}/', **self.session_headers())
+            self.assertEqual(response.status_code, 200)
+        self.assertCounts(0, 0)
+
+    def test_orm_delete_cascades_to_replies(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            parent = Comment.objects.create(anime=self.anime, comment='Parent')
+            Comment.objects.create(anime=self.anime, parent=parent, comment='Reply')
+            Comment.objects.create(episode=self.episode, comment='Episode')
+        self.assertCounts(2, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            parent.delete()
+        self.assertCounts(0, 1)
+
+    def test_updates_do_not_count(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            comment = Comment.objects.create(anime=self.anime, comment='Parent')
+        with self.captureOnCommitCallbacks(execute=True):
+            comment.comment = 'Edited'
+            comment.save()
+        self.assertCounts(1, 0)
+
+
+class RecordVisitTests(TestCase):
+    def test_upsert_increments_total_visits(self):
+        defaults = {'fingerprint_hash': 'hash', 'ip_address': '127.0.0.1', 'city': 'Tashkent'}
+        first = AnonymousSession.objects.record_visit('token', **defaults)
+        second = AnonymousSession.objects.record_visit('token', **defaults)
+
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(second.total_visits, 2)
+        self.assertGreaterEqual(second.last_seen_at, first.last_seen_at)
+        self.assertEqual(AnonymousSession.objects.get().total_visits, 2)
+
+
+class CursorPaginationTests(APITestCase):
+    def test_comments_are_paged_newest_first(self):
+        now = timezone.now()
+        comments = [Comment.objects.create(anime=self.anime, comment=f'Comment {i}') for i in range(20)]
+        for i, comment in enumerate(comments):
+            Comment.objects.filter(pk=comment.pk).update(created_at=now - timedelta(minutes=i))
+
+        seen = []
+        url = '/api/animes/naruto-0/comments/'
+        while url:
+            body = self.client.get(url).json()
+            seen.extend(c['id'] for c in body['results'])
+            url = body['next']
+        self.assertEqual(seen, [c.pk for c in comments])
+
+    def test_episodes_are_paged_by_number(self):
+        for number in range(16, 1, -1):
+            create_episode(self.anime, number)
+
+        seen = []
+        url = '/api/animes/naruto-0/episodes/'
+        while url:
+            body = self.client.get(url).json()
+            seen.extend(e['episode_number'] for e in body['data'])
+            url = body['meta']['next']
+        self.assertEqual(seen, list(range(1, 17)))
+
+
+class DonationListTests(TestCase):
+    def test_nameless_anonymous_donations_are_ranked_separately(self):
+        user = User.objects.create_user(email='naruto@example.com', password='hokage', full_name='Naruto')
+        for amount in (10, 20, 30):
+            Donation.objects.create(amount=amount)
+        Donation.objects.create(user=user, amount=50)
+        Donation.objects.create(name='Jiraiya', amount=15)
+        Donation.objects.create(name='Jiraiya', amount=25)
+
+        data = APIClient().get('/api/donations/').json()['data']
+
+        self.assertEqual(
+            [(d['user'] and d['user']['id'], d['total_amount'], d['donation_count']) for d in data['top_donors']],
+            [(user.pk, '50.00', 1), (None, '40.00', 1), (None, '30.00', 1)],
+        )
+        self.assertEqual([d['amount'] for d in data['other_donors']], ['20.00', '10.00'])
+
+
+class IdOrSlugFilterTests(APITestCase):
+    def test_only_ascii_digits_are_ids(self):
+        self.assertEqual(_id_or_slug_filter('anime__', '12'), {'anime__id': 12})
+        for identifier in ('1_0', ' 12', '+5', '-3', '١٢'):
+            self.assertEqual(_id_or_slug_filter('', identifier), {'slug': identifier.lower()})
+
+    def test_underscored_slug_is_not_routed_to_an_id(self):
+        anime = create_anime(1)
+        anime.slug = '1_0'
+        anime.save()
+        episode = create_episode(anime)
+
+        response = self.client.get('/api/animes/1_0/episodes/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([e['id'] for e in response.json()['data']], [episode.pk])
+
+
+class GenreLookupTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.genre = Genre.objects.create(name='Shonen', slug='Shonen')
+        self.anime.genres.add(self.genre)
+
+    def test_slugs_are_stored_lowercase(self):
+        self.assertEqual(Genre.objects.get(pk=self.genre.pk).slug, 'shonen')
+
+    def test_detail_by_id_or_slug(self):
+        for identifier in (self.genre.pk, 'shonen', 'SHONEN'):
+            response = self.client.get(f'/api/genres/{identifier}/')
+            self.assertEqual(response.status_code, 200, identifier)
+            self.assertEqual(response.json()['data']['id'], self.genre.pk)
+
+    def test_animes_by_id_or_slug(self):
+        for identifier in (self.genre.pk, 'shonen', 'SHONEN'):
+            response = self.client.get(f'/api/genres/{identifier}/animes/')
+            self.assertEqual(response.status_code, 200, identifier)
+            self.assertEqual([a['id'] for a in response.json()['data']], [self.anime.pk])
+
+    def test_migration_lowercases_existing_slugs(self):
+        lowercase_genre_slugs = import_module('user_side.migrations.0025_lowercase_genre_slugs').lowercase_genre_slugs
+        clash = Genre.objects.create(name='Seinen', slug='seinen')
+        Genre.objects.filter(pk=clash.pk).update(slug='Shonen')
+
+        lowercase_genre_slugs(apps, None)
+
+        self.assertEqual(Genre.objects.get(pk=clash.pk).slug, f'shonen-{clash.pk}')
+
+
+class ViewCounterTests(TestCase):
+    def test_apply_view_deltas(self):
+        animes = [create_anime(i) for i in range(3)]
+        Anime.objects.filter(pk=animes[0].pk).update(total_views=5)
+
+        apply_view_deltas(Anime, {animes[0].pk: 3, animes[1].pk: 1})
+
+        self.assertEqual(
+            list(Anime.objects.order_by('pk').values_list('total_views', flat=True)),
+            [8, 1, 0],
+        )
+
+
+@skipUnless(settings.REDIS_URL, 'flushing views needs REDIS_URL')
+class FlushViewsTests(TestCase):
+    def setUp(self):
+        self.anime = create_anime()
+        self.episode = create_episode(self.anime)
+        self.redis = get_redis()
+        self.keys = [EPISODE_VIEWS_KEY, ANIME_VIEWS_KEY, f'{EPISODE_VIEWS_KEY}:flush', f'{ANIME_VIEWS_KEY}:flush']
+        self.redis.delete(*self.keys)
+        self.addCleanup(self.redis.delete, *self.keys)
+
+    def assertViews(self, anime_views, episode_views):
+        self.anime.refresh_from_db()
+        self.episode.refresh_from_db()
+        self.assertEqual((self.anime.total_views, self.episode.total_views), (anime_views, episode_views))
+
+    def test_flush_applies_buffered_views_once(self):
+        for _ in range(3):
+            increment_views(self.episode.pk, self.anime.pk)
+        self.assertViews(0, 0)
+
+        flush_views()
+        flush_views()
+        self.assertViews(3, 3)
+        self.assertFalse(self.redis.exists(EPISODE_VIEWS_KEY, ANIME_VIEWS_KEY))
+
+    def test_flush_skips_while_another_run_holds_the_lock(self):
+        increment_views(self.episode.pk, self.anime.pk)
+        lock = self.redis.lock(f'{ANIME_VIEWS_KEY}:flush', timeout=10)
+        lock.acquire()
+        try:
+            flush_views()
+        finally:
+            lock.release()
+        self.assertViews(0, 1)
+
+        flush_views()
+        self.assertViews(1, 1)
+
+    def test_failed_flush_keeps_the_batch(self):
+        increment_views(self.episode.pk, self.anime.pk)
+        with patch('user_side.counters.apply_view_deltas', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                flush_views()
+        self.assertViews(0, 0)
+
+        flush_views()
+        self.assertViews(1, 1)
+
+
+class OwnerKeyTests(TestCase):
+    def setUp(self):
+        self.animes = [create_anime(0), create_anime(1)]
+        self.user = User.objects.create_user(email='naruto@example.com', password='hokage', full_name='Naruto')
+        self.session = AnonymousSession.objects.record_visit(
+            'token', fingerprint_hash='hash', ip_address='127.0.0.1', city='Tashkent',
+        )
+
+    def test_ownerless_likes_do_not_collide(self):
+        likes = [Like.objects.create(anime=self.animes[0], is_like=True) for _ in range(2)]
+        self.assertEqual([like.owner_key for like in likes], [None, None])
+
+    def test_populate_owner_key(self):
+        populate_owner_key = import_module('user_side.migrations.0022_like_owner_key_watchhistory_owner_key').populate_owner_key
+        user_like = Like.objects.create(user=self.user, anime=self.animes[0], is_like=True)
+        session_like = Like.objects.create(anonymous_session=self.session, anime=self.animes[1], is_like=False)
+        ownerless_like = Like.objects.create(anime=self.animes[0], is_like=True)
+        Like.objects.update(owner_key=None)
+
+        populate_owner_key(apps, None)
 
-# Create your tests here.
+        self.assertEqual(Like.objects.get(pk=user_like.pk).owner_key, f'u:{self.user.pk}')
+        self.assertEqual(Like.objects.get(pk=session_like.pk).owner_key, f's:{self.session.pk}')
+        self.assertIsNone(Like.objects.get(pk=ownerless_like.pk).owner_key)
@@ -12,31 +12,123 @@ from .base_response import (
     validation_error_response
 )
 from .models import *
-from .mixins import AnonymousSessionTrackingMixin
+from .caching import PUBLISHED_ANIME_CACHE_TIMEOUT, published_anime_cache_key
+from .authentication import is_blacklisted, mark_blacklisted
+from .counters import increment_views
+from .tasks import adjust_anime_favorites, record_watch
+from .pagination import CreatedAtCursorPagination, EpisodeNumberCursorPagination
+from .mixins import (
+    AnonymousSessionTrackingMixin,
+    CachedListMixin,
+    CachedRetrieveMixin,
+    SerializerContextMixin,
+    SerializerRelatedFieldsMixin
+)
 from rest_framework import generics, filters
 from django.utils import timezone
+from django.core.cache import cache
 from .filters import * 
-from django.db.models import F
+from django.db import transaction
+from django.db.models import BooleanField, Case, ExpressionWrapper, F, Count, Exists, OuterRef, Q, Subquery, Sum, When, Window, prefetch_related_objects
+from django.db.models.functions import Coalesce
 from rest_framework.exceptions import NotFound
+from rest_framework.fields import DateTimeField
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status
 import logging
 logger = logging.getLogger(__name__)
 
 
+def _id_or_slug_filter(prefix, identifier):
+    """
+    Lookup kwargs for a numeric id or a slug. Slugs are stored lowercase, so
+    the slug branch is an exact match that can use the unique index.
+    Only plain ASCII digits are an id; int() would also take '1_0' or '+5'.
+    """
+    if identifier.isascii() and identifier.isdigit():
+        return {f'{prefix}id': int(identifier)}
+    return {f'{prefix}slug': identifier.lower()}
+
+
+# Enough for the write endpoints and Anime.__str__ in their log lines.
+PUBLISHED_ANIME_FIELDS = ('id', 'slug', 'title', 'release_year', 'status', 'is_published')
+
+
+def get_published_anime(identifier):
+    """
+    Published anime by id or slug, loaded with PUBLISHED_ANIME_FIELDS only.
+    Hits are cached briefly; saving or deleting the anime drops its entries.
+    """
+    (field, value), = _id_or_slug_filter('', identifier).items()
+    key = published_anime_cache_key(field, value)
+    anime = cache.get(key)
+    if anime is None:
+        anime = Anime.objects.only(*PUBLISHED_ANIME_FIELDS).filter(**{field: value}, is_published=True).first()
+        if anime is not None:
+            cache.set(key, anime, PUBLISHED_ANIME_CACHE_TIMEOUT)
+    return anime
+
+
+# Columns the list serializers never read.
+ANIME_LIST_DEFERRED_FIELDS = ('search_text', 'views_count', 'total_favorites', 'total_dislikes', 'total_comments')
+EPISODE_LIST_FIELDS = (
+    'id', 'anime', 'anime__title', 'episode_number', 'title', 'title_ru', 'slug', 'description',
+    'thumbnail_url', 'duration_seconds', 'air_date', 'is_premium_only', 'total_views', 'is_published'
+)
+COMMENT_LIST_FIELDS = (
+    'id', 'user', 'user__full_name', 'anonymous_session', 'parent', 'comment', 'guest_name',
+    'is_approved', 'created_at', 'updated_at'
+)
+
+_datetime_field = DateTimeField()
+
+
+def _comment_author(request, comment):
+    """(author_name, can_edit) for a comment written by the current caller."""
+    if comment.user_id is not None:
+        return request.user.full_name, True
+    anon_session_id = request.session.get('anonymous_session_id')
+    can_edit = bool(anon_session_id) and comment.anonymous_session_id == anon_session_id
+    return comment.guest_name or "Anonymous", can_edit
+
+
+def _comment_payload(comment, author_name, can_edit, replies_count=0):
+    """
+    CommentSerializer's output for a comment the view has just written,
+    built from values already in hand instead of a serializer instance.
+    """
+    return {
+        'id': comment.id,
+        'author_name': author_name,
+        'comment': comment.comment,
+        'guest_name': comment.guest_name,
+        'parent': comment.parent_id,
+        'is_approved': comment.is_approved,
+        'replies_count': replies_count,
+        'can_edit': can_edit,
+        'can_delete': can_edit,
+        'created_at': _datetime_field.to_representation(comment.created_at),
+        'updated_at': _datetime_field.to_representation(comment.updated_at),
+    }
+
+
+def _auth_payload(user, request):
+    refresh = RefreshToken.for_user(user)
+    access = refresh.access_token
+    return {
+        "access": str(access),
+        "refresh": str(refresh),
+        "user": UserSerializer(user, context={'request': request}).data
+    }
+
+
 class RegisterView(APIView):
     def post(self, request):
         serializer = RegisterSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.save()
-            refresh = RefreshToken.for_user(user)  
-            
             return created_response(
-                data={
-                    "access": str(refresh.access_token),
-                    "refresh": str(refresh),
-                    "user": UserSerializer(user).data
-                },
+                data=_auth_payload(user, request),
                 message="User registered successfully"
             )
         return validation_error_response(
@@ -47,16 +139,11 @@ class RegisterView(APIView):
 
 class LoginView(APIView):
     def post(self, request):
-        serializer = LoginSerializer(data=request.data)
+        serializer = LoginSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
             user = serializer.validated_data['user']
-            refresh = RefreshToken.for_user(user)
             return success_response(
-                data={
-                    "access": str(refresh.access_token),
-                    "refresh": str(refresh),
-                    "user": UserSerializer(user).data
-                },
+                data=_auth_payload(user, request),
                 message="Login successful"
             )
         return unauthorized_response(message="Invalid credentials")
@@ -101,9 +188,16 @@ class LogoutView(APIView):
                 message="Validation failed"
             )
 
+        # Repeated logouts with the same token are answered without verifying it again.
+        if is_blacklisted(refresh_token):
+            return error_response(
+                message="Invalid or expired token"
+            )
+
         try:
             token = RefreshToken(refresh_token)
             token.blacklist()
+            mark_blacklisted(token, refresh_token)
             return success_response(
                 message="Successfully logged out"
             )
@@ -113,17 +207,19 @@ class LogoutView(APIView):
             )
     
 
-class AnimeListView(AnonymousSessionTrackingMixin, generics.ListAPIView):
-    queryset = Anime.objects.filter(is_published=True)
+class AnimeListView(AnonymousSessionTrackingMixin, CachedListMixin, SerializerContextMixin, generics.ListAPIView):
+    queryset = Anime.objects.filter(is_published=True).defer(*ANIME_LIST_DEFERRED_FIELDS).prefetch_related(*anime_prefetches())
     serializer_class = AnimeSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = CreatedAtCursorPagination
+    filter_backends = [DjangoFilterBackend, AnimeSearchFilter, filters.OrderingFilter]
     filterset_class = AnimeFilter
-    search_fields = ['title', 'english_title', 'russian_title', 'uzbek_title', 'description', 'type', 'status', 'season']
     ordering_fields = ['release_year', 'total_views', 'rating', 'created_at']
 
     def list(self, request, *args, **kwargs):
         self.track_anonymous_session()
+        return self.get_cached_response(self.build_list_response)
 
+    def build_list_response(self):
         queryset = self.filter_queryset(self.get_queryset())
         page = self.paginate_queryset(queryset)
         
@@ -134,7 +230,6 @@ class AnimeListView(AnonymousSessionTrackingMixin, generics.ListAPIView):
                 data=paginated_response.data.get('results'),
                 message="Anime list retrieved",
                 meta={
-                    "count": paginated_response.data.get('count'),
                     "next": paginated_response.data.get('next'),
                     "previous": paginated_response.data.get('previous')
                 }
@@ -147,7 +242,7 @@ class AnimeListView(AnonymousSessionTrackingMixin, generics.ListAPIView):
         )
     
 
-class AnimeDetailView(generics.RetrieveAPIView):
+class AnimeDetailView(CachedRetrieveMixin, generics.RetrieveAPIView):
     queryset = Anime.objects.filter(is_published=True)
     serializer_class = AnimeSerializer
     lookup_field = 'pk'
@@ -155,54 +250,53 @@ class AnimeDetailView(generics.RetrieveAPIView):
     def retrieve(self, request, *args, **kwargs):
         try:
             instance = self.get_object()
-            serializer = self.get_serializer(instance)
+            data = self.get_cached_data(instance, lambda: self.serialize(instance))
             return success_response(
-                data=serializer.data,
+                data=data,
                 message="Anime details retrieved"
             )
         except Anime.DoesNotExist:
             return not_found_response(message="Anime not found")
 
+    def serialize(self, instance):
+        # Relations are only loaded on a cache miss.
+        prefetch_related_objects([instance], *anime_prefetches())
+        return self.get_serializer(instance).data
+
 
-class EpisodeListView(generics.ListAPIView):
+class EpisodeListView(SerializerRelatedFieldsMixin, SerializerContextMixin, generics.ListAPIView):
     serializer_class = EpisodeSerializer
+    pagination_class = EpisodeNumberCursorPagination
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_class = EpisodeFilter
     ordering_fields = ['episode_number', 'air_date', 'total_views']
 
     def get_queryset(self):
-        anime_identifier = self.kwargs.get('anime_identifier')
-        
-        try:
-            anime_id = int(anime_identifier)
-            return Episode.objects.filter(
-                anime_id=anime_id,
-                anime__is_published=True,
-                is_published=True
-            ).order_by('episode_number')
-        except ValueError:
-            return Episode.objects.filter(
-                anime__slug=anime_identifier,
-                anime__is_published=True,
-                is_published=True
-            ).order_by('episode_number')
+        anime_filter = _id_or_slug_filter('anime__', self.kwargs.get('anime_identifier'))
+        queryset = Episode.objects.filter(
+            **anime_filter,
+            anime__is_published=True,
+            is_published=True
+        ).only(*EPISODE_LIST_FIELDS).prefetch_related(languages_prefetch()).order_by('episode_number')
+
+        return self.optimize_queryset(queryset)
 
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
         
-        if not queryset.exists():
-            return not_found_response(message="No episodes found for this anime")
-        
         page = self.paginate_queryset(queryset)
         
         if page is not None:
+            # An empty first page means nothing matches at all.
+            if not page and self.paginator.cursor is None:
+                return not_found_response(message="No episodes found for this anime")
+
             serializer = self.get_serializer(page, many=True)
             paginated_response = self.get_paginated_response(serializer.data)
             return success_response(
                 data=paginated_response.data.get('results'),
                 message="Episodes retrieved",
                 meta={
-                    "count": paginated_response.data.get('count'),
                     "next": paginated_response.data.get('next'),
                     "previous": paginated_response.data.get('previous')
                 }
@@ -214,40 +308,39 @@ class EpisodeListView(generics.ListAPIView):
             message="Episodes retrieved"
         )
 
-class EpisodeDetailView(AnonymousSessionTrackingMixin, generics.RetrieveAPIView):
+class EpisodeDetailView(AnonymousSessionTrackingMixin, CachedRetrieveMixin, generics.RetrieveAPIView):
     serializer_class = EpisodeDetailSerializer
 
     def get_object(self):
         anime_identifier = self.kwargs.get('anime_identifier')
         episode_identifier = self.kwargs.get('episode_identifier')
 
-        anime_filter = (
-            {'anime__id': int(anime_identifier)}
-            if anime_identifier.isdigit()
-            else {'anime__slug__iexact': anime_identifier}
-        )
-        episode_filter = (
-            {'id': int(episode_identifier)}
-            if episode_identifier.isdigit()
-            else {'slug__iexact': episode_identifier}
-        )
+        anime_filter = _id_or_slug_filter('anime__', anime_identifier)
+        episode_filter = _id_or_slug_filter('', episode_identifier)
 
         try:
-            obj = Episode.objects.filter(
+            return Episode.objects.select_related('anime').annotate(
+                requires_premium=ExpressionWrapper(
+                    Q(is_premium_only=True) | Q(anime__is_premium_only=True),
+                    output_field=BooleanField()
+                )
+            ).get(
                 **anime_filter,
                 **episode_filter,
                 anime__is_published=True,
                 is_published=True
-            ).first()
-            if not obj:
-                raise NotFound("Episode not found")
-            return obj
+            )
+        except Episode.DoesNotExist:
+            raise NotFound("Episode not found")
         except Exception as e:
             logger.error(f"Error retrieving episode: {str(e)}")
             raise NotFound("Episode not found")
 
     def check_premium_access(self, user, episode):
-        if not episode.is_premium_only and not episode.anime.is_premium_only:
+        requires_premium = getattr(episode, 'requires_premium', None)
+        if requires_premium is None:
+            requires_premium = episode.is_premium_only or episode.anime.is_premium_only
+        if not requires_premium:
             return True
         
         if not user:
@@ -261,6 +354,11 @@ class EpisodeDetailView(AnonymousSessionTrackingMixin, generics.RetrieveAPIView)
         
         return True
 
+    def serialize(self, instance):
+        # Languages are only loaded on a cache miss.
+        prefetch_related_objects([instance], languages_prefetch())
+        return self.get_serializer(instance).data
+
     def get(self, request, *args, **kwargs):
         try:
             instance = self.get_object()
@@ -277,46 +375,28 @@ class EpisodeDetailView(AnonymousSessionTrackingMixin, generics.RetrieveAPIView)
                     }
                 )
 
-            view_exists = False
-            if user:
-                view_exists = WatchHistory.objects.filter(
-                    user=user,
-                    anime=instance.anime,
-                    episode=instance
-                ).exists()
-            elif anon_session:
-                view_exists = WatchHistory.objects.filter(
-                    anonymous_session=anon_session,
-                    anime=instance.anime,
-                    episode=instance
-                ).exists()
-
-            if not view_exists:
-                Episode.objects.filter(pk=instance.pk).update(total_views=F('total_views') + 1)
-                Anime.objects.filter(pk=instance.anime.pk).update(total_views=F('total_views') + 1)
-
-                watch_history_data = {
-                    'anime': instance.anime,
-                    'episode': instance,
-                    'watched_at': timezone.now(),
-                    'ip_address': self.get_client_ip(),
-                    'device_type': request.headers.get('User-Agent', 'unknown'),
-                    'country': request.headers.get('X-Country', 'UZ')
-                }
-                if user:
-                    watch_history_data['user'] = user
-                elif anon_session:
-                    watch_history_data['anonymous_session'] = anon_session
-
-                try:
-                    WatchHistory.objects.create(**watch_history_data)
-                except Exception as e:
-                    logger.warning(f"Failed to create watch history: {str(e)}")
-
-            serializer = self.get_serializer(instance, context={'request': request})
-            logger.debug(f"Serialized episode: {instance}")
+            ip_address, device_type, country = self.get_client_meta()
+            # Losing a view must not fail the read, e.g. when the broker is down.
+            try:
+                record_watch.delay(
+                    instance.pk,
+                    instance.anime_id,
+                    user_id=user.pk if user else None,
+                    anonymous_session_id=anon_session.pk if anon_session else None,
+                    meta={
+                        'watched_at': timezone.now().isoformat(),
+                        'ip_address': ip_address,
+                        'device_type': device_type,
+                        'country': country
+                    }
+                )
+            except Exception as e:
+                logger.warning("Failed to queue watch history: %s", e)
+
+            data = self.get_cached_data(instance, lambda: self.serialize(instance))
+            logger.debug("Serialized episode: %s", instance)
             return success_response(
-                data=serializer.data,
+                data=data,
                 message="Episode details retrieved"
             )
         except NotFound:
@@ -328,14 +408,28 @@ class EpisodeDetailView(AnonymousSessionTrackingMixin, generics.RetrieveAPIView)
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
                
-class GenreListView(generics.ListAPIView):
-    queryset = Genre.objects.all().order_by('name')
+class GenreListView(CachedListMixin, generics.ListAPIView):
+    queryset = Genre.objects.annotate(
+        published_anime_count=Coalesce(
+            Subquery(
+                Anime.genres.through.objects.filter(genre=OuterRef('pk'), anime__is_published=True)
+                .order_by()
+                .values('genre')
+                .annotate(count=Count('anime'))
+                .values('count')
+            ),
+            0
+        )
+    ).only('id', 'name', 'name_ru', 'slug', 'description', 'created_at').order_by('name')
     serializer_class = GenreSerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'name_ru', 'description']
     ordering_fields = ['name', 'name_ru', 'created_at']
 
     def list(self, request, *args, **kwargs):
+        return self.get_cached_response(self.build_list_response)
+
+    def build_list_response(self):
         queryset = self.filter_queryset(self.get_queryset())
         page = self.paginate_queryset(queryset)
         
@@ -364,15 +458,12 @@ class GenreDetailView(generics.RetrieveAPIView):
     lookup_field = 'slug'
     def get_object(self):
         identifier = self.kwargs.get('identifier')
-        
-        try:
-            genre_id = int(identifier)
-            return Genre.objects.get(id=genre_id)
-        except (ValueError, Genre.DoesNotExist):
-            try:
-                return Genre.objects.get(slug=identifier)
-            except Genre.DoesNotExist:
-                raise NotFound("Genre not found")
+        genre_filter = _id_or_slug_filter('', identifier)
+
+        genre = Genre.objects.filter(**genre_filter).first()
+        if genre is None:
+            raise NotFound("Genre not found")
+        return genre
 
     def retrieve(self, request, *args, **kwargs):
         try:
@@ -386,43 +477,41 @@ class GenreDetailView(generics.RetrieveAPIView):
             return not_found_response(message="Genre not found")
 
 
-class GenreAnimeListView(generics.ListAPIView):
+class GenreAnimeListView(SerializerContextMixin, generics.ListAPIView):
     serializer_class = AnimeSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = CreatedAtCursorPagination
+    filter_backends = [DjangoFilterBackend, AnimeSearchFilter, filters.OrderingFilter]
     filterset_class = AnimeFilter
-    search_fields = ['title', 'english_title', 'russian_title', 'uzbek_title', 'description']
     ordering_fields = ['release_year', 'total_views', 'rating', 'created_at']
     
     def get_queryset(self):
         identifier = self.kwargs.get('identifier')
-        
-        try:
-            genre_id = int(identifier)
-            genre_filter = {'genres__id': genre_id}
-        except ValueError:
-            genre_filter = {'genres__slug': identifier}
+        genre_filter = _id_or_slug_filter('genre__', identifier)
+
+        # Semi-join on the through table so each anime appears once without DISTINCT.
+        in_genre = Anime.genres.through.objects.filter(anime_id=OuterRef('pk'), **genre_filter)
         
         return Anime.objects.filter(
-            **genre_filter,
+            Exists(in_genre),
             is_published=True
-        ).distinct().order_by('-created_at')
+        ).defer(*ANIME_LIST_DEFERRED_FIELDS).prefetch_related(*anime_prefetches()).order_by('-created_at')
 
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
         
-        if not queryset.exists():
-            return not_found_response(message="No anime found for this genre")
-        
         page = self.paginate_queryset(queryset)
         
         if page is not None:
+            # An empty first page means nothing matches at all.
+            if not page and self.paginator.cursor is None:
+                return not_found_response(message="No anime found for this genre")
+
             serializer = self.get_serializer(page, many=True)
             paginated_response = self.get_paginated_response(serializer.data)
             return success_response(
                 data=paginated_response.data.get('results'),
                 message="Anime list retrieved",
                 meta={
-                    "count": paginated_response.data.get('count'),
                     "next": paginated_response.data.get('next'),
                     "previous": paginated_response.data.get('previous')
                 }
@@ -435,24 +524,16 @@ class GenreAnimeListView(generics.ListAPIView):
         )
 class EpisodeWatchView(AnonymousSessionTrackingMixin, APIView):
     def post(self, request, anime_identifier, episode_identifier):
-        anime_filter = (
-            {'id': int(anime_identifier)}
-            if anime_identifier.isdigit()
-            else {'slug__iexact': anime_identifier}
-        )
+        anime_filter = _id_or_slug_filter('', anime_identifier)
         try:
-            anime = Anime.objects.get(**anime_filter, is_published=True)
-        except Anime.DoesNotExist:
-            return not_found_response(message="Anime not found")
+            anime = Anime.objects.only('id').filter(**anime_filter, is_published=True).first()
         except Exception as e:
             logger.error(f"Error finding anime: {str(e)}", exc_info=True)
             return error_response(message="An error occurred while finding anime", status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        if anime is None:
+            return not_found_response(message="Anime not found")
 
-        episode_filter = (
-            {'id': int(episode_identifier)}
-            if episode_identifier.isdigit()
-            else {'slug__iexact': episode_identifier}
-        )
+        episode_filter = _id_or_slug_filter('', episode_identifier)
         try:
             episode = Episode.objects.get(
                 anime=anime,
@@ -474,36 +555,20 @@ class EpisodeWatchView(AnonymousSessionTrackingMixin, APIView):
 
         user, anon_session = self.get_user_or_session()
 
-        lookup_filter = {
-            'anime': anime,
-            'episode': episode
-        }
-        
-        if user:
-            lookup_filter['user'] = user
-            lookup_filter['anonymous_session__isnull'] = True
-        elif anon_session:
-            lookup_filter['anonymous_session'] = anon_session
-            lookup_filter['user__isnull'] = True
-        else:
+        if not user and not anon_session:
             return error_response(
                 message="Unable to track watch history without user or session",
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        view_exists = WatchHistory.objects.filter(**lookup_filter).exists()
-
-        if not view_exists:
-            Episode.objects.filter(pk=episode.pk).update(total_views=F('total_views') + 1)
-            Anime.objects.filter(pk=anime.pk).update(total_views=F('total_views') + 1)
-
+        ip_address, device_type, country = self.get_client_meta()
         watch_history_data = {
             'anime': anime,
             'episode': episode,
             'watched_at': timezone.now(),
-            'ip_address': self.get_client_ip(),
-            'device_type': request.headers.get('User-Agent', 'unknown'),
-            'country': serializer.validated_data.get('country', request.headers.get('X-Country', 'UZ'))
+            'ip_address': ip_address,
+            'device_type': device_type,
+            'country': serializer.validated_data.get('country', country)
         }
         
         if user:
@@ -517,10 +582,16 @@ class EpisodeWatchView(AnonymousSessionTrackingMixin, APIView):
             watch_history_data['completed'] = serializer.validated_data['completed']
 
         try:
-            watch_history, created = WatchHistory.objects.update_or_create(
-                **lookup_filter,
-                defaults=watch_history_data
-            )
+            # update_or_create locks an existing row; views are only counted for new ones.
+            with transaction.atomic():
+                watch_history, created = WatchHistory.objects.update_or_create(
+                    owner_key=build_owner_key(user.pk if user else None, anon_session.pk if anon_session else None),
+                    anime=anime,
+                    episode=episode,
+                    defaults=watch_history_data
+                )
+                if created:
+                    transaction.on_commit(lambda: increment_views(episode.pk, anime.pk))
             
             return success_response(
                 message="Watch history recorded successfully",
@@ -540,27 +611,19 @@ class LikeToggleView(AnonymousSessionTrackingMixin, APIView):
         if not anime_identifier:
             return error_response(message="Anime identifier is required", status=status.HTTP_400_BAD_REQUEST)
         
-        anime_filter = (
-            {'id': int(anime_identifier)}
-            if anime_identifier.isdigit()
-            else {'slug__iexact': anime_identifier}
-        )
+        anime_filter = _id_or_slug_filter('', anime_identifier)
         
         try:
-            anime = Anime.objects.get(**anime_filter, is_published=True)
-        except Anime.DoesNotExist:
-            return not_found_response(message="Anime not found")
+            anime = Anime.objects.only('id').filter(**anime_filter, is_published=True).first()
         except Exception as e:
             logger.error(f"Error finding anime: {str(e)}", exc_info=True)
             return error_response(message="An error occurred while finding anime", status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        if anime is None:
+            return not_found_response(message="Anime not found")
         
         episode = None
         if episode_identifier:
-            episode_filter = (
-                {'id': int(episode_identifier)}
-                if episode_identifier.isdigit()
-                else {'slug__iexact': episode_identifier}
-            )
+            episode_filter = _id_or_slug_filter('', episode_identifier)
             
             try:
                 episode = Episode.objects.get(
@@ -584,108 +647,66 @@ class LikeToggleView(AnonymousSessionTrackingMixin, APIView):
         if not user and not anon_session:
             return error_response(message="Unable to process like without user or session", status=status.HTTP_400_BAD_REQUEST)
         
-        lookup_filter = {}
+        lookup_filter = {'owner_key': build_owner_key(user.pk if user else None, anon_session.pk if anon_session else None)}
         if episode:
             lookup_filter['episode'] = episode
-            lookup_filter['anime__isnull'] = True
         else:
             lookup_filter['anime'] = anime
             lookup_filter['episode__isnull'] = True
         
-        if user:
-            lookup_filter['user'] = user
-            lookup_filter['anonymous_session__isnull'] = True
-        elif anon_session:
-            lookup_filter['anonymous_session'] = anon_session
-            lookup_filter['user__isnull'] = True
-        
         try:
-            existing_like = Like.objects.filter(**lookup_filter).first()
-            
-            if existing_like:
-                if existing_like.is_like == is_like:
-                    existing_like.delete()
+            with transaction.atomic():
+                existing_like = Like.objects.select_for_update().filter(**lookup_filter).first()
+
+                if existing_like is None:
+                    like_data = {
+                        'is_like': is_like,
+                    }
                     
                     if episode:
-                        if is_like:
-                            Episode.objects.filter(pk=episode.pk).update(total_likes=F('total_likes') - 1)
-                        else:
-                            Episode.objects.filter(pk=episode.pk).update(total_dislikes=F('total_dislikes') - 1)
+                        like_data['episode'] = episode
                     else:
-                        if is_like:
-                            Anime.objects.filter(pk=anime.pk).update(total_likes=F('total_likes') - 1)
-                        else:
-                            Anime.objects.filter(pk=anime.pk).update(total_dislikes=F('total_dislikes') - 1)
+                        like_data['anime'] = anime
                     
-                    return success_response(
-                        data={'action': 'removed', 'is_like': None},
-                        message="Like removed successfully"
-                    )
-                else:
-                    old_is_like = existing_like.is_like
-                    existing_like.is_like = is_like
-                    existing_like.save()
+                    if user:
+                        like_data['user'] = user
+                    elif anon_session:
+                        like_data['anonymous_session'] = anon_session
                     
-                    if episode:
-                        if old_is_like:
-                            Episode.objects.filter(pk=episode.pk).update(
-                                total_likes=F('total_likes') - 1,
-                                total_dislikes=F('total_dislikes') + 1
-                            )
-                        else:
-                            Episode.objects.filter(pk=episode.pk).update(
-                                total_likes=F('total_likes') + 1,
-                                total_dislikes=F('total_dislikes') - 1
-                            )
-                    else:
-                        if old_is_like:
-                            Anime.objects.filter(pk=anime.pk).update(
-                                total_likes=F('total_likes') - 1,
-                                total_dislikes=F('total_dislikes') + 1
-                            )
-                        else:
-                            Anime.objects.filter(pk=anime.pk).update(
-                                total_likes=F('total_likes') + 1,
-                                total_dislikes=F('total_dislikes') - 1
-                            )
-                    
-                    return success_response(
-                        data={'action': 'updated', 'is_like': is_like},
-                        message="Like updated successfully"
-                    )
-            else:
-                like_data = {
-                    'is_like': is_like,
-                }
-                
-                if episode:
-                    like_data['episode'] = episode
-                else:
-                    like_data['anime'] = anime
-                
-                if user:
-                    like_data['user'] = user
-                elif anon_session:
-                    like_data['anonymous_session'] = anon_session
-                
-                Like.objects.create(**like_data)
-                
-                if episode:
-                    if is_like:
-                        Episode.objects.filter(pk=episode.pk).update(total_likes=F('total_likes') + 1)
-                    else:
-                        Episode.objects.filter(pk=episode.pk).update(total_dislikes=F('total_dislikes') + 1)
+                    Like.objects.create(**like_data)
+                    action = 'created'
+                    likes_delta, dislikes_delta = (1, 0) if is_like else (0, 1)
+                elif existing_like.is_like == is_like:
+                    existing_like.delete()
+                    action = 'removed'
+                    likes_delta, dislikes_delta = (-1, 0) if is_like else (0, -1)
                 else:
-                    if is_like:
-                        Anime.objects.filter(pk=anime.pk).update(total_likes=F('total_likes') + 1)
-                    else:
-                        Anime.objects.filter(pk=anime.pk).update(total_dislikes=F('total_dislikes') + 1)
-                
+                    existing_like.is_like = is_like
+                    existing_like.save(update_fields=['is_like', 'updated_at'])
+                    action = 'updated'
+                    likes_delta, dislikes_delta = (1, -1) if is_like else (-1, 1)
+
+                target = episode or anime
+                type(target).objects.filter(pk=target.pk).update(
+                    total_likes=F('total_likes') + likes_delta,
+                    total_dislikes=F('total_dislikes') + dislikes_delta
+                )
+
+            if action == 'created':
                 return success_response(
                     data={'action': 'created', 'is_like': is_like},
                     message="Like added successfully",
                     status=status.HTTP_201_CREATED
                 )
+            if action == 'removed':
+                return success_response(
+                    data={'action': 'removed', 'is_like': None},
+                    message="Like removed successfully"
+                )
+            return success_response(
+                data={'action': 'updated', 'is_like': is_like},
+                message="Like updated successfully"
+            )
                 
         except Exception as e:
             logger.error(f"Failed to process like: {str(e)}", exc_info=True)
@@ -695,8 +716,9 @@ class LikeToggleView(AnonymousSessionTrackingMixin, APIView):
             )
 
 
-class CommentListCreateView(AnonymousSessionTrackingMixin, generics.ListAPIView):
+class CommentListCreateView(AnonymousSessionTrackingMixin, SerializerContextMixin, generics.ListAPIView):
     serializer_class = CommentDetailSerializer
+    pagination_class = CreatedAtCursorPagination
     
     def get_queryset(self):
         anime_identifier = self.kwargs.get('anime_identifier')
@@ -705,20 +727,12 @@ class CommentListCreateView(AnonymousSessionTrackingMixin, generics.ListAPIView)
         queryset = Comment.objects.filter(
             is_approved=True,
             parent__isnull=True  
-        ).select_related('user', 'anonymous_session')
+        ).select_related('user').only(*COMMENT_LIST_FIELDS)
         if episode_identifier:
-            episode_filter = (
-                {'episode__id': int(episode_identifier)}
-                if episode_identifier.isdigit()
-                else {'episode__slug__iexact': episode_identifier}
-            )
+            episode_filter = _id_or_slug_filter('episode__', episode_identifier)
             queryset = queryset.filter(**episode_filter)
         elif anime_identifier:
-            anime_filter = (
-                {'anime__id': int(anime_identifier)}
-                if anime_identifier.isdigit()
-                else {'anime__slug__iexact': anime_identifier}
-            )
+            anime_filter = _id_or_slug_filter('anime__', anime_identifier)
             queryset = queryset.filter(**anime_filter, episode__isnull=True)
         
         return queryset.order_by('-created_at')
@@ -727,27 +741,17 @@ class CommentListCreateView(AnonymousSessionTrackingMixin, generics.ListAPIView)
         if not anime_identifier:
             return error_response(message="Anime identifier is required", status=status.HTTP_400_BAD_REQUEST)
         
-        anime_filter = (
-            {'id': int(anime_identifier)}
-            if anime_identifier.isdigit()
-            else {'slug__iexact': anime_identifier}
-        )
-        
         try:
-            anime = Anime.objects.get(**anime_filter, is_published=True)
-        except Anime.DoesNotExist:
-            return not_found_response(message="Anime not found")
+            anime = get_published_anime(anime_identifier)
         except Exception as e:
             logger.error(f"Error finding anime: {str(e)}", exc_info=True)
             return error_response(message="An error occurred while finding anime", status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        if anime is None:
+            return not_found_response(message="Anime not found")
         
         episode = None
         if episode_identifier:
-            episode_filter = (
-                {'id': int(episode_identifier)}
-                if episode_identifier.isdigit()
-                else {'slug__iexact': episode_identifier}
-            )
+            episode_filter = _id_or_slug_filter('', episode_identifier)
             
             try:
                 episode = Episode.objects.get(
@@ -792,17 +796,13 @@ class CommentListCreateView(AnonymousSessionTrackingMixin, generics.ListAPIView)
             return error_response(message="Unable to post comment without user or session", status=status.HTTP_400_BAD_REQUEST)
         
         try:
+            # The post_save signal queues the counter update once this commits.
             comment = Comment.objects.create(**comment_data)
-        
-            if episode:
-                Episode.objects.filter(pk=episode.pk).update(total_comments=F('total_comments') + 1)
-            else:
-                Anime.objects.filter(pk=anime.pk).update(total_comments=F('total_comments') + 1)
             
-            response_serializer = CommentSerializer(comment, context={'request': request})
+            author_name, can_edit = _comment_author(request, comment)
             
             return success_response(
-                data=response_serializer.data,
+                data=_comment_payload(comment, author_name, can_edit),
                 message="Comment posted successfully" if comment.is_approved else "Comment submitted for approval",
                 status=status.HTTP_201_CREATED
             )
@@ -818,30 +818,31 @@ class CommentListCreateView(AnonymousSessionTrackingMixin, generics.ListAPIView)
 
 class CommentDetailView(AnonymousSessionTrackingMixin, APIView):
 
-    def get_comment(self, comment_id):
-        try:
-            return Comment.objects.get(id=comment_id)
-        except Comment.DoesNotExist:
-            return None
-    
-    def check_permission(self, comment, request):
+    def get_owner_filter(self):
         user, anon_session = self.get_user_or_session()
-        
-        if user and comment.user == user:
-            return True
-        
-        if anon_session and comment.anonymous_session == anon_session:
-            return True
-        
-        return False
+        if user:
+            return {'user': user}
+        if anon_session:
+            return {'anonymous_session': anon_session}
+        return None
+
+    def get_owned_comment(self, comment_id):
+        """
+        The comment if it belongs to the caller's user or anonymous session,
+        fetched in one query. None means missing or owned by someone else.
+        """
+        owner = self.get_owner_filter()
+        if owner is None:
+            return None
+        return Comment.objects.filter(id=comment_id, **owner).first()
     
     def put(self, request, comment_id):
-        comment = self.get_comment(comment_id)
-        
-        if not comment:
-            return not_found_response(message="Comment not found")
+        comment = self.get_owned_comment(comment_id)
         
-        if not self.check_permission(comment, request):
+        if comment is None:
+            # Only a miss pays for telling "not found" from "not yours".
+            if not Comment.objects.filter(id=comment_id).exists():
+                return not_found_response(message="Comment not found")
             return error_response(message="You don't have permission to edit this comment", status=status.HTTP_403_FORBIDDEN)
         
         serializer = CommentSerializer(
@@ -855,58 +856,61 @@ class CommentDetailView(AnonymousSessionTrackingMixin, APIView):
             return validation_error_response(errors=serializer.errors, message="Invalid comment data")
         
         try:
-            serializer.save(updated_at=timezone.now())
-            return success_response(data=serializer.data, message="Comment updated successfully")
+            # Write only the submitted columns; save() would rewrite the whole row.
+            updated_fields = {**serializer.validated_data, 'updated_at': timezone.now()}
+            Comment.objects.filter(pk=comment.pk).update(**updated_fields)
+            for attr, value in updated_fields.items():
+                setattr(comment, attr, value)
+
+            author_name, can_edit = _comment_author(request, comment)
+            replies_count = comment.replies.filter(is_approved=True).count()
+            return success_response(
+                data=_comment_payload(comment, author_name, can_edit, replies_count),
+                message="Comment updated successfully"
+            )
         except Exception as e:
             logger.error(f"Failed to update comment: {str(e)}", exc_info=True)
             return error_response(message="Failed to update comment", status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
     def delete(self, request, comment_id):
-        comment = self.get_comment(comment_id)
-        
-        if not comment:
-            return not_found_response(message="Comment not found")
-        
-        if not self.check_permission(comment, request):
-            return error_response(message="You don't have permission to delete this comment", status=status.HTTP_403_FORBIDDEN)
+        owner = self.get_owner_filter()
         
         try:
-            # Update comment count
-            if comment.episode:
-                Episode.objects.filter(pk=comment.episode.pk).update(total_comments=F('total_comments') - 1)
-            elif comment.anime:
-                Anime.objects.filter(pk=comment.anime.pk).update(total_comments=F('total_comments') - 1)
-            
-            comment.delete()
-            return success_response(message="Comment deleted successfully")
+            # delete() runs in its own transaction; the post_delete signal
+            # queues the counter updates for when it commits.
+            deleted = 0
+            if owner is not None:
+                deleted, _ = Comment.objects.filter(id=comment_id, **owner).delete()
         except Exception as e:
             logger.error(f"Failed to delete comment: {str(e)}", exc_info=True)
             return error_response(message="Failed to delete comment", status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        
+        if not deleted:
+            # Only a miss pays for telling "not found" from "not yours".
+            if not Comment.objects.filter(id=comment_id).exists():
+                return not_found_response(message="Comment not found")
+            return error_response(message="You don't have permission to delete this comment", status=status.HTTP_403_FORBIDDEN)
+        
+        return success_response(message="Comment deleted successfully")
 
 
 
 class FavoriteView(AnonymousSessionTrackingMixin, APIView):
     def post(self, request, anime_identifier):
-        logger.debug(f"Received POST request to add favorite for anime_identifier: {anime_identifier}")
+        logger.debug("Received POST request to add favorite for anime_identifier: %s", anime_identifier)
 
         # Identify anime
-        anime_filter = (
-            {'id': int(anime_identifier)}
-            if anime_identifier.isdigit()
-            else {'slug__iexact': anime_identifier}
-        )
         try:
-            anime = Anime.objects.get(**anime_filter, is_published=True)
-            logger.debug(f"Found anime: {anime}")
-        except Anime.DoesNotExist:
-            logger.error(f"Anime not found for filter: {anime_filter}")
-            return not_found_response(message="Anime not found")
+            anime = get_published_anime(anime_identifier)
         except Exception as e:
             logger.error(f"Unexpected error finding anime: {str(e)}")
             return error_response(message="An error occurred while finding anime", status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        if anime is None:
+            logger.error(f"Anime not found for identifier: {anime_identifier}")
+            return not_found_response(message="Anime not found")
+        logger.debug("Found anime: %s", anime)
 
         user, anon_session = self.get_user_or_session()
-        logger.debug(f"User: {user}, Anonymous session: {anon_session}")
 
         if not user and not anon_session:
             logger.error("Both user and anonymous_session are None, cannot create Favorite")
@@ -915,46 +919,17 @@ class FavoriteView(AnonymousSessionTrackingMixin, APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Check if favorite exists
-        favorite_exists = False
-        if user:
-            favorite_exists = Favorite.objects.filter(
-                user=user,
-                anime=anime
-            ).exists()
-        elif anon_session:
-            favorite_exists = Favorite.objects.filter(
-                anonymous_session=anon_session,
-                anime=anime
-            ).exists()
-        logger.debug(f"Favorite exists: {favorite_exists}")
-
-        if favorite_exists:
-            logger.debug(f"Anime {anime} already favorited by user or session")
-            return success_response(
-                message="Anime already in favorites",
-                status=status.HTTP_200_OK
-            )
-
-        favorite_data = {
-            'anime': anime,
-            'added_at': timezone.now()
-        }
-        if user:
-            favorite_data['user'] = user
-            favorite_data['anonymous_session'] = None
-        elif anon_session:
-            favorite_data['anonymous_session'] = anon_session
-            favorite_data['user'] = None
+        owner = {'user': user} if user else {'anonymous_session': anon_session}
 
         try:
-            favorite = Favorite.objects.create(**favorite_data)
-            Anime.objects.filter(pk=anime.pk).update(total_favorites=F('total_favorites') + 1)
-            logger.debug(f"Created Favorite record: {favorite}, incremented total_favorites")
-            return success_response(
-                message="Anime added to favorites",
-                status=status.HTTP_201_CREATED
+            # The per-owner unique constraints on Favorite make this safe under races.
+            favorite, created = Favorite.objects.get_or_create(
+                **owner,
+                anime=anime,
+                defaults={'added_at': timezone.now()}
             )
+            if created:
+                adjust_anime_favorites.delay(anime.pk, 1)
         except Exception as e:
             logger.error(f"Error creating Favorite record: {str(e)}")
             return error_response(
@@ -962,26 +937,33 @@ class FavoriteView(AnonymousSessionTrackingMixin, APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-    def delete(self, request, anime_identifier):
-        logger.debug(f"Received DELETE request to remove favorite for anime_identifier: {anime_identifier}")
+        if not created:
+            logger.debug("Anime %s already favorited by user or session", anime)
+            return success_response(
+                message="Anime already in favorites",
+                status=status.HTTP_200_OK
+            )
 
-        anime_filter = (
-            {'id': int(anime_identifier)}
-            if anime_identifier.isdigit()
-            else {'slug__iexact': anime_identifier}
+        logger.debug("Created Favorite record: %s, incremented total_favorites", favorite)
+        return success_response(
+            message="Anime added to favorites",
+            status=status.HTTP_201_CREATED
         )
+
+    def delete(self, request, anime_identifier):
+        logger.debug("Received DELETE request to remove favorite for anime_identifier: %s", anime_identifier)
+
         try:
-            anime = Anime.objects.get(**anime_filter, is_published=True)
-            logger.debug(f"Found anime: {anime}")
-        except Anime.DoesNotExist:
-            logger.error(f"Anime not found for filter: {anime_filter}")
-            return not_found_response(message="Anime not found")
+            anime = get_published_anime(anime_identifier)
         except Exception as e:
             logger.error(f"Unexpected error finding anime: {str(e)}")
             return error_response(message="An error occurred while finding anime", status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        if anime is None:
+            logger.error(f"Anime not found for identifier: {anime_identifier}")
+            return not_found_response(message="Anime not found")
+        logger.debug("Found anime: %s", anime)
 
         user, anon_session = self.get_user_or_session()
-        logger.debug(f"User: {user}, Anonymous session: {anon_session}")
 
         if not user and not anon_session:
             logger.error("Both user and anonymous_session are None, cannot remove Favorite")
@@ -1003,13 +985,13 @@ class FavoriteView(AnonymousSessionTrackingMixin, APIView):
             ).first()
 
         if not favorite:
-            logger.debug(f"No favorite found for anime {anime}")
+            logger.debug("No favorite found for anime %s", anime)
             return not_found_response(message="Anime not in favorites")
 
         try:
             favorite.delete()
-            Anime.objects.filter(pk=anime.pk).update(total_favorites=F('total_favorites') - 1)
-            logger.debug(f"Deleted Favorite record for anime {anime}, decremented total_favorites")
+            adjust_anime_favorites.delay(anime.pk, -1)
+            logger.debug("Deleted Favorite record for anime %s, decremented total_favorites", anime)
             return success_response(
                 message="Anime removed from favorites",
                 status=status.HTTP_200_OK
@@ -1021,19 +1003,27 @@ class FavoriteView(AnonymousSessionTrackingMixin, APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-class FavoriteListView(AnonymousSessionTrackingMixin, generics.ListAPIView):
+class FavoriteListView(AnonymousSessionTrackingMixin, SerializerContextMixin, generics.ListAPIView):
     serializer_class = AnimeSerializer
 
     def get_queryset(self):
         user, anon_session = self.get_user_or_session()
-        logger.debug(f"User: {user}, Anonymous session: {anon_session}")
 
         if user:
-            return Favorite.objects.filter(user=user).select_related('anime').order_by('-added_at')
+            owner = {'favorites__user': user}
         elif anon_session:
-            return Favorite.objects.filter(anonymous_session=anon_session).select_related('anime').order_by('-added_at')
-        logger.error("Both user and anonymous_session are None, returning empty queryset")
-        return Favorite.objects.none()
+            owner = {'favorites__anonymous_session': anon_session}
+        else:
+            logger.error("Both user and anonymous_session are None, returning empty queryset")
+            return Anime.objects.none()
+
+        # Ordering reuses the favorites join from the filter, one row per favorite.
+        return (
+            Anime.objects.filter(**owner)
+            .defer(*ANIME_LIST_DEFERRED_FIELDS)
+            .prefetch_related(*anime_prefetches())
+            .order_by('-favorites__added_at')
+        )
 
     def list(self, request, *args, **kwargs):
         logger.debug("Received GET request for FavoriteListView")
@@ -1045,7 +1035,7 @@ class FavoriteListView(AnonymousSessionTrackingMixin, generics.ListAPIView):
 
             page = self.paginate_queryset(queryset)
             if page is not None:
-                serializer = self.get_serializer([favorite.anime for favorite in page], many=True, context={'request': request})
+                serializer = self.get_serializer(page, many=True)
                 paginated_response = self.get_paginated_response(serializer.data)
                 return success_response(
                     data=paginated_response.data.get('results'),
@@ -1057,7 +1047,7 @@ class FavoriteListView(AnonymousSessionTrackingMixin, generics.ListAPIView):
                     }
                 )
 
-            serializer = self.get_serializer([favorite.anime for favorite in queryset], many=True, context={'request': request})
+            serializer = self.get_serializer(queryset, many=True)
             return success_response(
                 data=serializer.data,
                 message="Favorite anime retrieved"
@@ -1069,18 +1059,36 @@ class FavoriteListView(AnonymousSessionTrackingMixin, generics.ListAPIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
         
-class DonationListView(generics.ListAPIView):
+class DonationListView(SerializerRelatedFieldsMixin, SerializerContextMixin, generics.ListAPIView):
     serializer_class = DonationSerializer
     queryset = Donation.objects.all()
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     ordering_fields = ['amount', 'created_at']
 
+    def get_ranked_donations(self):
+        # Per-donor totals are window annotations, so the top donors and each
+        # page of the rest are LIMIT/OFFSET slices of the same ranked query.
+        # Donation.save() only merges rows by user or name, so a nameless
+        # anonymous donation is a donor of its own and gets its pk as key.
+        unmerged = Case(
+            When(Q(user__isnull=True) & (Q(name__isnull=True) | Q(name='')), then=F('pk')),
+            default=None,
+        )
+        donor = [F('user_id'), F('name'), unmerged]
+        return (
+            self.get_queryset()
+            .annotate(
+                total_amount=Window(Sum('amount'), partition_by=donor),
+                donation_count=Window(Count('id'), partition_by=donor),
+            )
+            .order_by('-total_amount', '-amount', '-created_at')
+        )
+
     def list(self, request, *args, **kwargs):
-        top_donors_qs = Donation.top_donors(limit=3)
-        top_serialized = DonationTopSerializer(top_donors_qs, many=True).data
+        donations = self.get_ranked_donations()
+        top_serialized = DonationTopSerializer(donations[:3], many=True).data
 
-        remaining_donors_qs = self.get_queryset()[3:]
-        page = self.paginate_queryset(remaining_donors_qs)
+        page = self.paginate_queryset(donations[3:])
 
         if page is not None:
             serializer_page = self.get_serializer(page, many=True)
@@ -1099,7 +1107,7 @@ class DonationListView(generics.ListAPIView):
                 }
             )
 
-        serializer = self.get_serializer(self.get_queryset(), many=True)
+        serializer = self.get_serializer(donations, many=True)
         return success_response(
             data={"top_donors": top_serialized, "other_donors": serializer.data},
             message="Donations retrieved successfully"